@@ -1,220 +1,223 @@
-import copy
-from collections import defaultdict
-import time
+from budget import Budget
+from clause_store import ClauseStore
+from dimacs_parser import load_dimacs, parse_dimacs
+from heuristics import make_var_order
+from propagation import WatchedPropagator
+from restarts import make_restart_policy
+from solve_result import print_outcome, run_solver
 
 
-def parse_cnf(filename):
+def parse_cnf(filename, compact=False):
     """
     Parse CNF file in DIMACS format.
-    Returns clauses as a dictionary and a set of variables.
+    Returns clauses as a dictionary and the number of variables.
+    With compact=True the clauses are loaded straight into a ClauseStore.
     """
-    clauses = {}
-    num_vars = 0
-    with open(filename, 'r') as f:
-        clause_idx = 0
-        for line in f:
-            if line.startswith('c'):
-                continue
-            elif line.startswith('p cnf'):
-                parts = line.strip().split()
-                num_vars = int(parts[2])
-            else:
-                clause = [int(x) for x in line.strip().split() if x != '0']
-                if clause:
-                    clauses[clause_idx] = clause
-                    clause_idx += 1
-    return clauses, num_vars
-
-
-def get_all_variables(clauses):
-    """
-    Extract all unique variables from the clauses.
-    """
-    return list({abs(lit) for clause in clauses.values() for lit in clause})
-
-
-def get_unit_literals(clauses):
-    """
-    Extract all unit literals (clauses of length 1).
-    """
-    return [clause[0] for clause in clauses.values() if len(clause) == 1]
-
-
-def solve_literal(clauses, literal):
-    """
-    Simplify the clauses by solving a literal.
-    Returns updated clauses or raises a conflict exception if a conflict occurs.
-    """
-    new_clauses = {}
-    for key, clause in clauses.items():
-        if literal in clause:
-            continue  # Clause is satisfied
-        if -literal in clause:
-            new_clause = [l for l in clause if l != -literal]
-            if not new_clause:
-                # Conflict: Empty clause created
-                raise ValueError("Conflict detected while solving literal.")
-            new_clauses[key] = new_clause
-        else:
-            new_clauses[key] = clause
-    return new_clauses
-
-
-def get_copied_clauses(clauses):
-    """
-    Returns a deep copy of the clauses.
-    """
-    return copy.deepcopy(clauses)
-
-
-def resolve_clauses(clause1, clause2, pivot):
-    """
-    Resolves two clauses on the pivot variable.
-    Returns the resolved clause.
-    """
-    resolved = list(set(clause1 + clause2) - {pivot, -pivot})
-    return resolved
+    if compact:
+        return load_dimacs(filename)
+    num_vars, clauses = parse_dimacs(filename)
+    return dict(enumerate(clauses)), num_vars
 
 
 class CDCL:
     """
     Implements the CDCL (Conflict-Driven Clause Learning) algorithm for SAT solving.
+    Conflicts are analysed on the implication graph recorded by the propagator
+    to derive a first-UIP clause, the solver backjumps to the level where that
+    clause becomes unit, and learned clauses are kept for the rest of the search.
+    Variables taking part in a conflict are bumped in the branching heuristic,
+    VSIDS by default.
+
+    The search restarts from level 0 when the restart policy asks for it
+    (see restarts.RESTARTS), keeping its learned clauses and activities.
+    With phase saving a decision gives a variable the value it last had, so
+    a restart resumes close to where the search was instead of starting over.
+
+    Learned clauses are reduced every `reduce_interval` conflicts, the
+    interval growing by REDUCE_INCREMENT each time, and whenever there are
+    more than `max_learned` of them: the worse half goes, glue and locked
+    clauses stay (see WatchedPropagator.reduce_learned).
+
+    A profile (instrumentation.SolverProfile) times the phases of this
+    solver; without one nothing is wrapped. A time limit in seconds and
+    decision and conflict limits make __solve__ return None (unknown) once
+    one is reached, see budget.Budget.
     """
 
-    def __init__(self, clauses):
+    REDUCE_INCREMENT = 300
+
+    def __init__(self, clauses, heuristic="vsids", restarts="luby", phase_saving=True,
+                 reduce_interval=2000, max_learned=None, profile=None,
+                 time_limit=None, max_decisions=None, max_conflicts=None):
+        if isinstance(clauses, ClauseStore):
+            clauses = clauses.copy()  # The propagator reorders literals and learned clauses are appended
+        else:
+            clauses = ClauseStore.from_clauses(clauses)
         self.clauses = clauses
+        self.propagator = WatchedPropagator(clauses)
+        self.heuristic = heuristic
+        self.var_order = make_var_order(heuristic, self.propagator)
+        self.restarts = restarts
+        self.restart_policy = make_restart_policy(restarts)
+        self.phase_saving = phase_saving
+        self.phases = [0] * self.propagator.num_vars  # Last polarity of each variable, 1 for false
+        self.reduce_interval = reduce_interval
+        self.next_reduce = reduce_interval
+        self.max_learned = max_learned
         self.num_evaluations = 0
         self.num_backtracking = 0
+        self.num_learned = 0
+        self.num_restarts = 0
+        self.num_decisions = 0
+        self.num_conflicts = 0
+        self.budget = Budget.from_limits(time_limit, max_decisions, max_conflicts)
+        self.stopped_by = None  # The limit that ended the search, if any
         self.variable_history = []
-        self.decision_stack = []  # Tracks decisions for backjumping
+        if profile is not None:
+            profile.attach(self)
 
     def __is_satisfied__(self):
         """Checks if the problem is satisfied."""
-        if not self.clauses:
+        if self.propagator.all_assigned():
             return True
-        if any(len(clause) == 0 for clause in self.clauses.values()):
-            return False
         return None
 
-    def __simplify__(self, var_assignments):
+    def __simplify__(self):
         """Simplifies the problem using unit propagation."""
-        while True:
-            unit_literals = get_unit_literals(self.clauses)
-            if not unit_literals:
-                break
-            for literal in unit_literals:
-                var_assignments[abs(literal)] = literal > 0
-                try:
-                    self.clauses = solve_literal(self.clauses, literal)
-                except ValueError:
-                    # Return False if a conflict is detected
-                    return False
-        return True
+        return self.propagator.propagate()
 
-    def __choose_next_var__(self, var_assignments):
+    def __choose_next_var__(self):
         """Chooses the next variable to assign."""
-        all_vars = get_all_variables(self.clauses)
-        for var in all_vars:
-            if var not in var_assignments:
-                return var
-        return None
+        return self.var_order.next_variable(self.propagator.values)
 
     def __analyze_conflict(self):
         """
-        Analyzes a conflict and generates a learned clause.
+        Derives the first-UIP learned clause from the current conflict.
+        Returns the clause, asserting literal first and the literal of the
+        highest remaining level second, and the level to backjump to.
         """
-        if not self.decision_stack:
-            raise ValueError("No decisions made to analyze.")
-
-        # Use the last conflict clause
-        conflict_clause = list(self.clauses.values())[0]
+        propagator = self.propagator
+        var_order = self.var_order
+        levels = propagator.levels
+        trail = propagator.trail
+        conflict_level = propagator.decision_level()
+
+        literals = propagator.store.literals
+        offsets = propagator.store.offsets
+        lengths = propagator.store.lengths
+        num_original = propagator.num_original
+        reason = propagator.conflict
+        learned = []
+        seen = set()
+        pending = 0  # Literals of the conflict level still to be resolved
+        index = len(trail) - 1
 
-        # Initialize the learned clause with the conflict clause
-        learned_clause = conflict_clause[:]
+        while True:
+            if reason >= num_original:
+                propagator.bump_clause(reason)
+            start = offsets[reason]
+            for k in range(start, start + lengths[reason]):
+                literal = literals[k]
+                var = literal >> 1
+                if var in seen or levels[var] == 0:
+                    continue
+                seen.add(var)
+                var_order.bump(var)
+                if levels[var] == conflict_level:
+                    pending += 1
+                else:
+                    learned.append(literal)
+
+            # Resolve with the reason of the most recent literal involved
+            while trail[index] >> 1 not in seen:
+                index -= 1
+            literal = trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            reason = propagator.reasons[literal >> 1]
+        var_order.decay()
+        propagator.decay_clause_activity()
 
-        # Resolve with decisions in reverse order until a backtracking level is determined
-        while self.decision_stack:
-            decision_literal, _ = self.decision_stack.pop()
-            learned_clause = resolve_clauses(learned_clause, [decision_literal], abs(decision_literal))
+        if not learned:
+            return [literal ^ 1], 0
 
-            # Check if the learned clause is asserting at a lower decision level
-            if len(learned_clause) == 1 or all(lit not in self.decision_stack for lit in learned_clause):
-                break
+        # Watch the literal that was assigned last among the rest
+        highest = max(range(len(learned)), key=lambda i: levels[learned[i] >> 1])
+        learned[0], learned[highest] = learned[highest], learned[0]
+        return [literal ^ 1] + learned, levels[learned[0] >> 1]
 
-        return learned_clause
-
-    def __solve__(self, var_assignments):
-        """Recursively solves the SAT problem with enhanced backtracking and clause learning."""
-        self.num_evaluations += 1
-
-        # Unit propagation and simplification
-        if not self.__simplify__(var_assignments):
-            # Conflict detected, analyze and learn from it
-            learned_clause = self.__analyze_conflict()
-            self.clauses[len(self.clauses)] = learned_clause  # Add learned clause to the formula
-            self.num_backtracking += 1  # Increment backtracking count
-            return False, var_assignments
-
-        # Check if the problem is satisfied
-        satisfied = self.__is_satisfied__()
-        if satisfied is not None:
-            return satisfied, var_assignments
-
-        # Save current state before making a decision
-        prev_clauses = get_copied_clauses(self.clauses)
-        prev_assignments = var_assignments.copy()
-
-        # Choose the next variable
-        var = self.__choose_next_var__(var_assignments)
-        if var is None:
-            return True, var_assignments
-
-        for value in [True, False]:
-            var_assignments[var] = value
-            self.decision_stack.append((var if value else -var, "decision"))
-            try:
-                # Simplify clauses based on the decision
-                self.clauses = solve_literal(self.clauses, var if value else -var)
-
-                # Recursively solve with the updated state
-                satisfiable, assignments = self.__solve__(var_assignments)
-                if satisfiable:
-                    return satisfiable, assignments
-            except ValueError:
-                # Conflict occurred, learn a clause and backtrack
-                learned_clause = self.__analyze_conflict()
-                self.clauses[len(self.clauses)] = learned_clause
+    def __backtrack(self, level):
+        """
+        Pops the trail back to the given decision level, saving the phases
+        of the unassigned variables.
+        """
+        unassigned = self.propagator.backtrack(level)
+        if self.phase_saving:
+            phases = self.phases
+            for literal in unassigned:
+                phases[literal >> 1] = literal & 1
+        self.var_order.reinsert(unassigned)
+
+    def __solve__(self):
+        """
+        Solves the SAT problem, backjumping and learning on every conflict.
+        Returns None if the budget runs out first.
+        """
+        propagator = self.propagator
+        levels = propagator.levels
+        budget = self.budget
+        if budget is not None:
+            budget.start()
+        while True:
+            if budget is not None:
+                self.stopped_by = budget.exhausted(self)
+                if self.stopped_by is not None:
+                    return None  # Out of budget: unknown
+            self.num_evaluations += 1
+
+            # Unit propagation and simplification
+            if not self.__simplify__():
                 self.num_backtracking += 1
+                self.num_conflicts += 1
+                if propagator.decision_level() == 0:
+                    return False
+                learned, level = self.__analyze_conflict()
+                lbd = len({levels[literal >> 1] for literal in learned})
+                self.__backtrack(level)
+                propagator.learn(learned, lbd)
+                self.num_learned += 1
+                if self.num_learned >= self.next_reduce or (
+                        self.max_learned is not None and propagator.num_learned() > self.max_learned):
+                    propagator.reduce_learned()
+                    self.reduce_interval += self.REDUCE_INCREMENT
+                    self.next_reduce = self.num_learned + self.reduce_interval
+                if self.restart_policy.on_conflict(lbd):
+                    self.__backtrack(0)
+                    self.restart_policy.on_restart()
+                    self.num_restarts += 1
+                continue
 
-            # Restore state to backtrack
-            var_assignments = prev_assignments.copy()
-            self.clauses = get_copied_clauses(prev_clauses)
+            # Check if the problem is satisfied
+            satisfied = self.__is_satisfied__()
+            if satisfied is not None:
+                return satisfied
 
-        return False, var_assignments
+            # Choose the next variable
+            var = self.__choose_next_var__()
+            if var is None:
+                return True
+            self.num_decisions += 1
+            propagator.new_decision_level()
+            propagator.assign(2 * var + self.phases[var])
 
     def solve(self):
-        """Runs the CDCL algorithm with detailed output."""
-        print("\nStarting CDCL solver...")
-        start_time = time.time()
-
-        try:
-            result, assignments = self.__solve__({})
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-
-            print("\tSolver finished!")
-            print(f"Status: {'SATISFIABLE' if result else 'UNSATISFIABLE'}")
-            print(f"Time taken: {elapsed_time:.2f} seconds")
-            print(f"Number of evaluations: {self.num_evaluations}")
-            print(f"Number of backtracks: {self.num_backtracking}")
-
-
-            return result, assignments, self.num_evaluations, self.num_backtracking
-
-        except KeyboardInterrupt:
-            print("\nSolver interrupted by user")
-            elapsed_time = time.time() - start_time
-            print(f"Time elapsed: {elapsed_time:.2f} seconds")
-            print(f"Evaluations: {self.num_evaluations}")
-            print(f"Backtracks: {self.num_backtracking}")
-            return False, {}, self.num_evaluations, self.num_backtracking
\ No newline at end of file
+        """
+        Runs the CDCL algorithm with detailed output, see solve_result.run_solver
+        for the quiet version. Returns the result, assignments, and statistics.
+        """
+        print(f"\nStarting CDCL solver ({self.heuristic}, {self.restarts} restarts)...")
+        result = run_solver(self)
+        print_outcome(result)
+        return result.as_tuple()
@@ -1,245 +1,193 @@
-import copy
-from collections import defaultdict
-import time
+from budget import Budget
+from clause_store import ClauseStore
+from dimacs_parser import load_dimacs, parse_dimacs
+from heuristics import make_var_order
+from occurrences import OccurrenceCounts
+from propagation import WatchedPropagator
+from solve_result import print_outcome, run_solver
 
 
-def parse_cnf(filename):
+def parse_cnf(filename, compact=False):
     """
     Parse CNF file in DIMACS format.
-    Returns clauses as a dictionary and a set of variables.
+    Returns clauses as a dictionary and the number of variables.
+    With compact=True the clauses are loaded straight into a ClauseStore.
     """
-    clauses = {}
-    num_vars = 0
-    with open(filename, 'r') as f:
-        clause_idx = 0
-        for line in f:
-            if line.startswith('c'):
-                continue
-            elif line.startswith('p cnf'):
-                parts = line.strip().split()
-                num_vars = int(parts[2])
-            else:
-                clause = [int(x) for x in line.strip().split() if x != '0']
-                if clause:
-                    clauses[clause_idx] = clause
-                    clause_idx += 1
-    return clauses, num_vars
-
-
-def get_all_variables(clauses):
-    """
-    Extract all unique variables from the clauses.
-    """
-    return list({abs(lit) for clause in clauses.values() for lit in clause})
-
-
-def get_unit_literals(clauses):
-    """
-    Extract all unit literals (clauses of length 1).
-    """
-    return [clause[0] for clause in clauses.values() if len(clause) == 1]
-
-
-def solve_literal(clauses, literal):
-    """
-    Simplify the clauses by solving a literal.
-    Returns updated clauses or False if a conflict occurs.
-    """
-    new_clauses = {}
-    for key, clause in clauses.items():
-        if literal in clause:
-            continue  # Clause is satisfied
-        if -literal in clause:
-            new_clause = [l for l in clause if l != -literal]
-            if not new_clause:
-                # Conflict: Empty clause created
-                return False
-            new_clauses[key] = new_clause
-        else:
-            new_clauses[key] = clause
-    return new_clauses
-
-
-def get_copied_clauses(clauses):
-    """
-    Returns a deep copy of the clauses.
-    """
-    return copy.deepcopy(clauses)
-
-
-def pure_literal_elimination(clauses):
-    """
-    Eliminate pure literals from the clauses.
-    A literal is pure if it always appears with the same polarity.
-    """
-    literal_counts = defaultdict(int)
-    for clause in clauses.values():
-        for lit in clause:
-            literal_counts[lit] += 1
-
-    pure_literals = [lit for lit in literal_counts if -lit not in literal_counts]
-    for pure_literal in pure_literals:
-        clauses = solve_literal(clauses, pure_literal)
-        if clauses is False:
-            return False
-    return clauses
-
-
-def remove_tautologies(clauses):
-    """
-    Remove tautological clauses from the CNF formula.
-    A clause is tautological if it contains both a literal and its negation.
-    """
-    new_clauses = {}
-    for key, clause in clauses.items():
-        if any(-lit in clause for lit in clause):
-            continue  # Skip tautological clause
-        new_clauses[key] = clause
-    return new_clauses
-
-
-def get_unassigned_variables(var_assignments, clauses):
-    """
-    Identify unassigned variables from the clauses and variable assignments.
-    """
-    all_vars = get_all_variables(clauses)
-    return [var for var in all_vars if var not in var_assignments]
+    if compact:
+        return load_dimacs(filename)
+    num_vars, clauses = parse_dimacs(filename)
+    return dict(enumerate(clauses)), num_vars
 
 
 class DPLL:
     """
     Implements the DPLL algorithm for SAT solving with unit propagation,
     pure literal elimination, tautology removal, and proper backtracking.
-    """
-
-    def __init__(self, clauses):
+    The branching heuristic is picked by name, see heuristics.HEURISTICS.
+    Clauses are either a dict of DIMACS literal lists or a ClauseStore,
+    which is copied so that the caller's store is left as it is.
+
+    Tautologies are dropped once, when the propagator loads the formula.
+    With pure_literals=True, pure literals are found from occurrence counts
+    kept up to date along the trail (see occurrences.OccurrenceCounts), as
+    their negation's count drops to zero. It is off by default: on Sudoku
+    encodings propagation already implies every pure literal, so the
+    counting only costs time.
+
+    A profile (instrumentation.SolverProfile) times the phases of this
+    solver; without one nothing is wrapped. A time limit in seconds and
+    decision and conflict limits make __solve__ return None (unknown) once
+    one is reached, see budget.Budget.
+    """
+
+    def __init__(self, clauses, heuristic="order", pure_literals=False, profile=None,
+                 time_limit=None, max_decisions=None, max_conflicts=None):
+        if isinstance(clauses, ClauseStore):
+            clauses = clauses.copy()  # The propagator reorders literals and learned clauses are appended
+        else:
+            clauses = ClauseStore.from_clauses(clauses)
         self.clauses = clauses
+        self.propagator = WatchedPropagator(self.clauses)
+        self.heuristic = heuristic
+        self.pure_literals = pure_literals
+        self.occurrences = OccurrenceCounts(self.propagator) if pure_literals else None
+        self.var_order = make_var_order(heuristic, self.propagator)
         self.num_evaluations = 0
         self.num_backtracking = 0
+        self.num_decisions = 0
+        self.num_conflicts = 0
+        self.budget = Budget.from_limits(time_limit, max_decisions, max_conflicts)
+        self.stopped_by = None  # The limit that ended the search, if any
         self.variable_history = []
+        if profile is not None:
+            profile.attach(self)
 
-    def __is_satisfied__(self, var_assignments):
+    def __is_satisfied__(self):
         """
         Checks if the problem is satisfied.
-        Additionally ensures all variables are assigned.
+        Conflicts are caught during propagation, so the formula is satisfied
+        once every variable is assigned.
         """
-        if not self.clauses:
-            # Ensure all variables are assigned
-            unassigned_vars = get_unassigned_variables(var_assignments, self.clauses)
-            if unassigned_vars:
-                print(f"Unassigned variables remain: {unassigned_vars}")
-                return False
+        if self.propagator.all_assigned():
             return True
-        if any(len(clause) == 0 for clause in self.clauses.values()):
-            return False
         return None
 
-    def __simplify__(self, var_assignments):
+    def __simplify__(self):
         """
-        Simplifies the problem using unit propagation, pure literal elimination,
-        and tautology removal.
+        Simplifies the problem using unit propagation and, if enabled, pure
+        literal elimination. Tautologies are removed once when the solver is created.
         """
-        while True:
-            # Unit propagation
-            unit_literals = get_unit_literals(self.clauses)
-            if not unit_literals:
-                break
-            for literal in unit_literals:
-                var_assignments[abs(literal)] = literal > 0
-                self.clauses = solve_literal(self.clauses, literal)
-                if self.clauses is False:
-                    return False
-
-        # Pure literal elimination
-        self.clauses = pure_literal_elimination(self.clauses)
-        if self.clauses is False:
+        # Unit propagation
+        if not self.propagator.propagate():
+            self.__bump_conflict__()
             return False
+        if self.occurrences is None:
+            return True
 
-        # Remove tautological clauses
-        self.clauses = remove_tautologies(self.clauses)
-
+        # Pure literal elimination, until assigning them uncovers no new ones
+        pure = self.occurrences.pure_literals()
+        while pure:
+            for literal in pure:
+                self.propagator.assign(literal)
+            self.propagator.propagate()  # Cannot conflict: pure literals only satisfy clauses
+            pure = self.occurrences.pure_literals()
         return True
 
-    def __choose_next_var__(self, var_assignments):
+    def __bump_conflict__(self):
         """
-        Chooses the next variable to assign.
+        Bumps the activity of the variables in the falsified clause.
         """
-        all_vars = get_all_variables(self.clauses)
-        for var in all_vars:
-            if var not in var_assignments:
-                return var
-        return None
+        if self.propagator.conflict is None:
+            return
+        for literal in self.clauses.clause(self.propagator.conflict):
+            self.var_order.bump(literal >> 1)
+        self.var_order.decay()
 
-    def __solve__(self, var_assignments):
+    def __choose_next_literal__(self):
         """
-        Recursively solves the SAT problem with proper backtracking.
+        Chooses the next decision literal, the positive literal of the next variable.
         """
-        self.num_evaluations += 1
+        var = self.var_order.next_variable(self.propagator.values)
+        return None if var is None else 2 * var
 
-        # Simplify the formula
-        if not self.__simplify__(var_assignments):
-            self.num_backtracking += 1
-            return False, var_assignments
-
-        # Check if satisfied
-        satisfied = self.__is_satisfied__(var_assignments)
-        if satisfied is not None:
-            return satisfied, var_assignments
-
-        # Save current state before making a decision
-        prev_clauses = get_copied_clauses(self.clauses)
-        prev_assignments = var_assignments.copy()
-
-        # Choose the next variable to assign
-        var = self.__choose_next_var__(var_assignments)
-        if var is None:
-            return True, var_assignments
-
-        for value in [True, False]:
-            var_assignments[var] = value
-            self.clauses = solve_literal(self.clauses, var if value else -var)
-            if self.clauses is False:
+    def __backtrack__(self, level):
+        """
+        Pops the trail back to the given decision level.
+        """
+        trail_size = self.propagator.trail_lim[level]
+        unassigned = self.propagator.backtrack(level)
+        if self.occurrences is not None:
+            self.occurrences.backtrack(trail_size, unassigned)
+        self.__reinsert__(trail_size, unassigned)
+
+    def __reinsert__(self, trail_size, unassigned):
+        """
+        Hands the literals just popped from the trail, which started at
+        position trail_size, back to the branching heuristic.
+        """
+        self.var_order.reinsert(unassigned)
+
+    def __solve__(self):
+        """
+        Solves the SAT problem with chronological backtracking.
+        The search is a loop over an explicit stack of the open decisions, each
+        with the decision level it was made at and whether its negation is
+        being tried already, so the depth of the search is not bounded by
+        Python's recursion limit. Nodes are visited in the same order as a
+        recursive search that tries each decision and then its negation.
+        Returns None if the budget runs out first.
+        """
+        propagator = self.propagator
+        decisions = []  # [literal, level before the decision, negation tried]
+        budget = self.budget
+        if budget is not None:
+            budget.start()
+        while True:
+            if budget is not None:
+                self.stopped_by = budget.exhausted(self)
+                if self.stopped_by is not None:
+                    return None  # Out of budget: unknown
+            self.num_evaluations += 1
+
+            # Simplify the formula
+            if self.__simplify__():
+                # Check if satisfied
+                satisfied = self.__is_satisfied__()
+                if satisfied is not None:
+                    return satisfied
+
+                # Choose the next literal to assign, its negation is tried on backtracking
+                decision = self.__choose_next_literal__()
+                if decision is None:
+                    return True
+                decisions.append([decision, propagator.decision_level(), False])
+                self.num_decisions += 1
+                propagator.new_decision_level()
+                propagator.assign(decision)
                 continue
-            satisfiable, assignments = self.__solve__(var_assignments)
-            if satisfiable:
-                return satisfiable, assignments
-            # Backtrack
-            var_assignments = prev_assignments.copy()
-            self.clauses = get_copied_clauses(prev_clauses)
             self.num_backtracking += 1
-
-        return False, var_assignments
+            self.num_conflicts += 1
+
+            # Backtrack to the latest decision whose negation is untried
+            while decisions:
+                decision, level, flipped = decisions[-1]
+                self.__backtrack__(level)
+                self.num_backtracking += 1
+                if not flipped:
+                    decisions[-1][2] = True
+                    propagator.new_decision_level()
+                    propagator.assign(decision ^ 1)
+                    break
+                decisions.pop()
+            else:
+                return False
 
     def solve(self):
         """
-        Runs the DPLL algorithm with added debugging to verify complete solutions.
-        """
-        print("\nStarting DPLL solver...")
-        start_time = time.time()
-
-        try:
-            result, assignments = self.__solve__({})
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-
-            print("\tSolver finished!")
-            print(f"Status: {'SATISFIABLE' if result else 'UNSATISFIABLE'}")
-            print(f"Time taken: {elapsed_time:.2f} seconds")
-            print(f"Evaluations: {self.num_evaluations}")
-            print(f"Backtracks: {self.num_backtracking}")
-
-            if result:
-                unassigned_vars = get_unassigned_variables(assignments, self.clauses)
-                if unassigned_vars:
-                    print(f"Error: Unassigned variables remain: {unassigned_vars}")
-                    return False, {}
-
-            return result, assignments, self.num_evaluations, self.num_backtracking
-
-        except KeyboardInterrupt:
-            elapsed_time = time.time() - start_time
-            print("\nSolver interrupted by user")
-            print(f"Time elapsed: {elapsed_time:.2f} seconds")
-            print(f"Evaluations: {self.num_evaluations}")
-            print(f"Backtracks: {self.num_backtracking}")
-            return False, {}, self.num_evaluations, self.num_backtracking
\ No newline at end of file
+        Runs the DPLL algorithm and prints its progress, see solve_result.run_solver
+        for the quiet version. Returns the result, assignments, and statistics.
+        """
+        print(f"\nStarting DPLL solver ({self.heuristic})...")
+        result = run_solver(self)
+        print_outcome(result)
+        return result.as_tuple()
@@ -1,13 +1,14 @@
-import copy
 from collections import defaultdict
-import time
+from DPLL import DPLL, parse_cnf
+from heuristics import VarHeap
+from solve_result import print_outcome, run_solver
 
 def calculate_jw_scores(clauses):
     """
     Calculate the Jeroslow-Wang (JW) scores for all literals.
     """
     scores = defaultdict(float)
-    for clause in clauses.values():
+    for clause in clauses:
         clause_size = len(clause)
         weight = 2 ** -clause_size
         for literal in clause:
@@ -15,253 +16,180 @@ def calculate_jw_scores(clauses):
     return scores
 
 
-def parse_cnf(filename):
-    """
-    Parse CNF file in DIMACS format.
-    Returns clauses as a dictionary and a set of variables.
-    """
-    clauses = {}
-    num_vars = 0
-    with open(filename, 'r') as f:
-        clause_idx = 0
-        for line in f:
-            if line.startswith('c'):
-                continue
-            elif line.startswith('p cnf'):
-                parts = line.strip().split()
-                num_vars = int(parts[2])
-            else:
-                clause = [int(x) for x in line.strip().split() if x != '0']
-                if clause:
-                    clauses[clause_idx] = clause
-                    clause_idx += 1
-    return clauses, num_vars
-
-
-def get_all_variables(clauses):
-    """
-    Extract all unique variables from the clauses.
-    """
-    return list({abs(lit) for clause in clauses.values() for lit in clause})
-
-
-def get_unit_literals(clauses):
-    """
-    Extract all unit literals (clauses of length 1).
-    """
-    return [clause[0] for clause in clauses.values() if len(clause) == 1]
-
-
-def solve_literal(clauses, literal):
-    """
-    Simplify the clauses by solving a literal.
-    Returns updated clauses or False if a conflict occurs.
-    """
-    new_clauses = {}
-    for key, clause in clauses.items():
-        if literal in clause:
-            continue  # Clause is satisfied
-        if -literal in clause:
-            new_clause = [l for l in clause if l != -literal]
-            if not new_clause:
-                # Conflict: Empty clause created
-                return False
-            new_clauses[key] = new_clause
+class JWScores:
+    """
+    Jeroslow-Wang scores maintained incrementally along the propagator trail.
+
+    The score of a literal is the sum of 2^-k over the clauses that contain it,
+    are not satisfied and have k unassigned literals. Each clause keeps a count
+    of its true and its unassigned literals, so assigning or unassigning a
+    literal only visits the clauses it occurs in. Assigned literals keep their
+    scores up to date too, which makes every update exactly reversible.
+
+    The two-sided variant ranks variables by J(x) + J(-x) and the one-sided
+    variant ranks literal codes by J(l), each in an indexed heap.
+    """
+
+    def __init__(self, propagator, two_sided=True):
+        self.propagator = propagator
+        self.two_sided = two_sided
+        store = propagator.store
+        self.store = store
+        num_vars = propagator.num_vars
+
+        self.occurs = [[] for _ in range(2 * num_vars)]
+        for index in range(len(store)):
+            for literal in store.clause(index):
+                self.occurs[literal].append(index)
+        self.true_count = [0] * len(store)
+        self.free_count = list(store.lengths)
+        max_size = max(self.free_count, default=0)
+        self.weights = [2.0 ** -size for size in range(max_size + 1)]
+
+        self.literal_scores = [0.0] * (2 * num_vars)
+        for literal, score in calculate_jw_scores(store.clause(index) for index in range(len(store))).items():
+            self.literal_scores[literal] = score
+        if two_sided:
+            self.var_scores = [0.0] * num_vars
+            for var in propagator.variables:
+                self.var_scores[var] = self.literal_scores[2 * var] + self.literal_scores[2 * var + 1]
+            self.heap = VarHeap(self.var_scores)
         else:
-            new_clauses[key] = clause
-    return new_clauses
-
-
-def get_copied_clauses(clauses):
-    """
-    Returns a deep copy of the clauses.
-    """
-    return copy.deepcopy(clauses)
-
-
-def pure_literal_elimination(clauses):
-    """
-    Eliminate pure literals from the clauses.
-    A literal is pure if it always appears with the same polarity.
-    """
-    literal_counts = defaultdict(int)
-    for clause in clauses.values():
-        for lit in clause:
-            literal_counts[lit] += 1
-
-    pure_literals = [lit for lit in literal_counts if -lit not in literal_counts]
-    for pure_literal in pure_literals:
-        clauses = solve_literal(clauses, pure_literal)
-        if clauses is False:
-            return False
-    return clauses
-
-
-def remove_tautologies(clauses):
-    """
-    Remove tautological clauses from the CNF formula.
-    A clause is tautological if it contains both a literal and its negation.
-    """
-    new_clauses = {}
-    for key, clause in clauses.items():
-        if any(-lit in clause for lit in clause):
-            continue  # Skip tautological clause
-        new_clauses[key] = clause
-    return new_clauses
-
-
-def get_unassigned_variables(var_assignments, clauses):
-    """
-    Identify unassigned variables from the clauses and variable assignments.
-    """
-    all_vars = get_all_variables(clauses)
-    return [var for var in all_vars if var not in var_assignments]
-
-
-class JW:
-    """
-    Implements the JW algorithm for SAT solving with unit propagation,
-    pure literal elimination, tautology removal, and proper backtracking.
-    """
+            self.heap = VarHeap(self.literal_scores)
+        self.reinsert(propagator.variables)
 
-    def __init__(self, clauses):
-        self.clauses = clauses
-        self.num_evaluations = 0
-        self.num_backtracking = 0
-        self.variable_history = []
+        self.synced = 0  # Number of trail entries already counted in the scores
 
-    def __is_satisfied__(self, var_assignments):
+    def __shift(self, index, delta):
         """
-        Checks if the problem is satisfied.
-        Additionally ensures all variables are assigned.
+        Adds delta to the score of every literal of a clause.
         """
-        if not self.clauses:
-            # Ensure all variables are assigned
-            unassigned_vars = get_unassigned_variables(var_assignments, self.clauses)
-            if unassigned_vars:
-                print(f"Unassigned variables remain: {unassigned_vars}")
-                return False
-            return True
-        if any(len(clause) == 0 for clause in self.clauses.values()):
-            return False
-        return None
-
-    def __simplify__(self, var_assignments):
+        literal_scores = self.literal_scores
+        update = self.heap.update
+        literals = self.store.literals
+        start = self.store.offsets[index]
+        for k in range(start, start + self.store.lengths[index]):
+            literal = literals[k]
+            literal_scores[literal] += delta
+            if self.two_sided:
+                var = literal >> 1
+                self.var_scores[var] += delta
+                update(var)
+            else:
+                update(literal)
+
+    def __assign(self, literal):
+        true_count = self.true_count
+        free_count = self.free_count
+        weights = self.weights
+        for index in self.occurs[literal]:
+            true_count[index] += 1
+            free_count[index] -= 1
+            if true_count[index] == 1:
+                self.__shift(index, -weights[free_count[index] + 1])
+        for index in self.occurs[literal ^ 1]:
+            free_count[index] -= 1
+            if true_count[index] == 0:
+                self.__shift(index, weights[free_count[index] + 1])
+
+    def __unassign(self, literal):
+        true_count = self.true_count
+        free_count = self.free_count
+        weights = self.weights
+        for index in self.occurs[literal]:
+            true_count[index] -= 1
+            free_count[index] += 1
+            if true_count[index] == 0:
+                self.__shift(index, weights[free_count[index]])
+        for index in self.occurs[literal ^ 1]:
+            free_count[index] += 1
+            if true_count[index] == 0:
+                self.__shift(index, -weights[free_count[index]])
+
+    def sync(self):
         """
-        Simplifies the problem using unit propagation, pure literal elimination,
-        and tautology removal.
+        Counts the trail entries assigned since the last call.
         """
-        while True:
-            # Unit propagation
-            unit_literals = get_unit_literals(self.clauses)
-            if not unit_literals:
-                break
-            for literal in unit_literals:
-                var_assignments[abs(literal)] = literal > 0
-                self.clauses = solve_literal(self.clauses, literal)
-                if self.clauses is False:
-                    return False
-
-        # Pure literal elimination
-        self.clauses = pure_literal_elimination(self.clauses)
-        if self.clauses is False:
-            return False
-
-        # Remove tautological clauses
-        self.clauses = remove_tautologies(self.clauses)
+        trail = self.propagator.trail
+        for position in range(self.synced, len(trail)):
+            self.__assign(trail[position])
+        self.synced = len(trail)
 
-        return True
-
-    def __choose_next_var__(self, var_assignments):
+    def backtrack(self, trail_size, unassigned):
         """
-        Chooses the next variable using the JW heuristic.
+        Reverts the counted entries among the literals just popped from the trail,
+        which started at position trail_size.
         """
-        scores = calculate_jw_scores(self.clauses)
-        unassigned = get_unassigned_variables(var_assignments, self.clauses)
-        if not unassigned:
-            return None
-
-        # Combine positive and negative literal scores
-        best_var = None
-        max_score = float('-inf')
-        for var in unassigned:
-            score = scores[var] + scores[-var]
-            if score > max_score:
-                max_score = score
-                best_var = var
-        return best_var
+        for literal in unassigned[:max(self.synced - trail_size, 0)]:
+            self.__unassign(literal)
+        self.synced = min(self.synced, trail_size)
+        self.reinsert(literal >> 1 for literal in unassigned)
 
+    def reinsert(self, variables):
+        """
+        Puts unassigned variables (or both their literals) back into the heap.
+        """
+        push = self.heap.push
+        for var in variables:
+            if self.two_sided:
+                push(var)
+            else:
+                push(2 * var)
+                push(2 * var + 1)
 
-    def __solve__(self, var_assignments):
+    def best_literal(self):
         """
-        Recursively solves the SAT problem with proper backtracking.
+        Returns the unassigned literal code to branch on, or None if every variable is assigned.
         """
-        self.num_evaluations += 1
+        self.sync()
+        values = self.propagator.values
+        heap = self.heap
+        while heap:
+            key = heap.pop()
+            if self.two_sided:
+                key *= 2  # Positive literal first, as the original JW solver did
+            if values[key] is None:
+                return key
+        return None
 
-        # Simplify the formula
-        if not self.__simplify__(var_assignments):
-            self.num_backtracking += 1
-            return False, var_assignments
 
-        # Check if satisfied
-        satisfied = self.__is_satisfied__(var_assignments)
-        if satisfied is not None:
-            return satisfied, var_assignments
+class JW(DPLL):
+    """
+    Implements the JW algorithm for SAT solving with unit propagation,
+    pure literal elimination, tautology removal, and proper backtracking.
+    Only the branching heuristic differs from DPLL: "jw" is the two-sided
+    Jeroslow-Wang rule and "jw-one-sided" the one-sided one.
+    """
 
-        # Save current state before making a decision
-        prev_clauses = get_copied_clauses(self.clauses)
-        prev_assignments = var_assignments.copy()
+    HEURISTICS = ("jw", "jw-one-sided")
 
-        # Choose the next variable to assign
-        var = self.__choose_next_var__(var_assignments)
-        if var is None:
-            return True, var_assignments
+    def __init__(self, clauses, heuristic="jw", pure_literals=False, profile=None,
+                 time_limit=None, max_decisions=None, max_conflicts=None):
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(f"Unknown heuristic '{heuristic}', expected one of {list(self.HEURISTICS)}")
+        super().__init__(clauses, pure_literals=pure_literals, profile=profile, time_limit=time_limit,
+                         max_decisions=max_decisions, max_conflicts=max_conflicts)
+        self.heuristic = heuristic
+        self.scores = JWScores(self.propagator, two_sided=heuristic == "jw")
 
-        for value in [True, False]:
-            var_assignments[var] = value
-            self.clauses = solve_literal(self.clauses, var if value else -var)
-            if self.clauses is False:
-                continue
-            satisfiable, assignments = self.__solve__(var_assignments)
-            if satisfiable:
-                return satisfiable, assignments
-            # Backtrack
-            var_assignments = prev_assignments.copy()
-            self.clauses = get_copied_clauses(prev_clauses)
-            self.num_backtracking += 1
+    def __choose_next_literal__(self):
+        """
+        Chooses the next decision literal using the JW heuristic.
+        """
+        return self.scores.best_literal()
 
-        return False, var_assignments
+    def __reinsert__(self, trail_size, unassigned):
+        """
+        Reverts the scores of the literals just popped from the trail.
+        """
+        self.scores.backtrack(trail_size, unassigned)
 
     def solve(self):
         """
-        Runs the JW algorithm and returns the result, assignments, and statistics.
+        Runs the JW algorithm and prints its progress, see solve_result.run_solver
+        for the quiet version. Returns the result, assignments, and statistics.
         """
         print("\nStarting JW solver...")
-        start_time = time.time()
-
-        try:
-            result, assignments = self.__solve__({})
-            elapsed_time = time.time() - start_time
-
-            print("\tSolver finished!")
-            print(f"Status: {'SATISFIABLE' if result else 'UNSATISFIABLE'}")
-            print(f"Time taken: {elapsed_time:.2f} seconds")
-            print(f"Evaluations: {self.num_evaluations}")
-            print(f"Backtracks: {self.num_backtracking}")
-
-            # Check for unassigned variables
-            if result:
-                unassigned_vars = get_unassigned_variables(assignments, self.clauses)
-                if unassigned_vars:
-                    print(f"Error: Unassigned variables remain: {unassigned_vars}")
-                    result = False  # Mark as unsatisfiable
-
-            return result, assignments, self.num_evaluations, self.num_backtracking
-
-        except KeyboardInterrupt:
-            elapsed_time = time.time() - start_time
-            print("\nSolver interrupted by user")
-            print(f"Time elapsed: {elapsed_time:.2f} seconds")
-            print(f"Evaluations: {self.num_evaluations}")
-            print(f"Backtracks: {self.num_backtracking}")
-            return False, {}, self.num_evaluations, self.num_backtracking
+        result = run_solver(self)
+        print_outcome(result)
+        return result.as_tuple()
@@ -0,0 +1,175 @@
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from rules_cache import load_base_rules, puzzle_formula
+from solve_result import run_solver
+from solver_api import is_grid, load_store
+from sudoku_codec import format_grid, model_to_grid
+
+TIME_LIMIT = 150  # Default per-puzzle time limit in seconds
+TIMER_GRACE = 5  # Seconds past the limit before the interval timer interrupts a solver
+
+
+class SolveTimeout(Exception):
+    """
+    Raised inside a worker when a puzzle runs out of time.
+    """
+
+
+# Per-worker state, set up once by _init_worker
+_base_rules = None
+_timeout = None
+_armed = False  # Whether the timer of the current task may still raise
+
+
+def _raise_timeout(signum, frame):
+    global _armed
+    if _armed:
+        _armed = False
+        raise SolveTimeout()
+
+
+def _arm():
+    """
+    Starts the backstop timer of a task. Solvers stop themselves at the time
+    limit; the timer only interrupts what runs past it by TIMER_GRACE
+    seconds, such as loading a huge formula.
+    """
+    global _armed
+    if _timeout and hasattr(signal, "setitimer"):
+        _armed = True
+        signal.setitimer(signal.ITIMER_REAL, _timeout + TIMER_GRACE)
+
+
+def _disarm():
+    """
+    Stops the time limit of a task. A signal still in flight is ignored, so
+    no SolveTimeout can be raised once this returns.
+    """
+    global _armed
+    _armed = False
+    if _timeout and hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _init_worker(rules_file, timeout):
+    """
+    Loads the base rules into the worker and installs the timeout handler.
+    """
+    global _base_rules, _timeout
+    if rules_file is not None:
+        _base_rules, _ = load_base_rules(rules_file)
+    _timeout = timeout
+    if timeout and hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+
+def _load_formula(puzzle, solver_class=None):
+    """
+    Returns the clauses of a puzzle: a CNF file path, a grid encoded in
+    memory with sudoku_encoding, or a list of clue literals on top of the
+    worker's base rules. Solvers with `grid_input` set take a grid as it is.
+    """
+    if is_grid(puzzle) and getattr(solver_class, "grid_input", False):
+        return puzzle
+    if isinstance(puzzle, str) or is_grid(puzzle):
+        return load_store(puzzle)
+    if _base_rules is None:
+        raise ValueError("Clue puzzles need a rules_file")
+    return puzzle_formula(_base_rules, puzzle)
+
+
+def _solve_task(task):
+    """
+    Solves one puzzle inside a worker and returns its index and result.
+    The solver gets what is left of the time limit after loading as its
+    time budget, and stops with status "UNKNOWN" and its statistics so far
+    when it runs out. An interval timer backs this up: past the limit plus
+    TIMER_GRACE it unwinds whatever is running, status "TIMEOUT". The timer
+    is stopped as soon as the solve returns or raises, and it raises at most
+    once, so it is always caught here rather than escaping into the pool.
+    """
+    index, puzzle, solver_class, heuristic = task
+    result = {"puzzle": puzzle if isinstance(puzzle, str) else index,
+              "solver": solver_class.__name__, "heuristic": heuristic,
+              "evaluations": None, "backtracks": None, "restarts": None, "assignments": {}}
+    solver = None
+    start_time = time.perf_counter()
+    try:
+        _arm()
+        try:
+            clauses = _load_formula(puzzle, solver_class)
+            options = {} if heuristic is None else {"heuristic": heuristic}
+            if _timeout:
+                options["time_limit"] = max(_timeout - (time.perf_counter() - start_time), 0)
+            solver = solver_class(clauses, **options)
+            result["heuristic"] = solver.heuristic
+            outcome = run_solver(solver)
+        finally:
+            _disarm()
+        result["status"] = outcome.status
+        result["assignments"] = outcome.model
+        if is_grid(puzzle) and outcome.satisfiable:
+            result["solution"] = format_grid(model_to_grid(outcome.model, len(puzzle)))
+        result["evaluations"] = outcome.stats["evaluations"]
+        result["backtracks"] = outcome.stats["backtracks"]
+        result["restarts"] = outcome.stats.get("restarts", 0)
+    except SolveTimeout:
+        result["status"] = "TIMEOUT"
+        if solver is not None:
+            result["evaluations"] = solver.num_evaluations
+            result["backtracks"] = solver.num_backtracking
+            result["restarts"] = getattr(solver, "num_restarts", 0)
+    except Exception as e:
+        result["status"] = "ERROR"
+        result["error"] = str(e)
+    result["time_taken"] = time.perf_counter() - start_time
+    return index, result
+
+
+def solve_many(puzzles, solver, workers=None, heuristic=None, rules_file=None, timeout=TIME_LIMIT, window=None):
+    """
+    Solves a stream of puzzles on a pool of worker processes and yields
+    (index, result) pairs as they complete, in completion order.
+
+    A puzzle is the path of a CNF file, a grid (list of rows, 0 for empty
+    cells) that the worker encodes in memory, or a list of clue literals
+    (see rules_cache.clue_literals), which needs the rules_file of its grid
+    size. Each worker loads those rules once when it starts, then only adds
+    the clues per puzzle. The pool stays up for the whole batch: a puzzle that
+    runs out of its `timeout` seconds is reported with status "UNKNOWN" and
+    the statistics so far (or "TIMEOUT" if only the backstop timer could
+    stop it), and its worker carries on. A result is a dict with the solver, heuristic, status,
+    assignments, evaluations, backtracks, restarts and time_taken of the puzzle, and
+    the one-line solution of a solved grid.
+
+    Puzzles are taken from the iterable only as workers free up, with at most
+    `window` (four per worker by default) submitted and not yet yielded, so a
+    generator over an input of any length is solved in constant memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = window or 4 * workers
+    done = queue.Queue()
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(rules_file, timeout)) as pool:
+        pending = 0
+        for index, puzzle in enumerate(puzzles):
+            pool.apply_async(_solve_task, ((index, puzzle, solver, heuristic),),
+                             callback=done.put, error_callback=done.put)
+            pending += 1
+            if pending >= window:
+                yield _completed(done)
+                pending -= 1
+        for _ in range(pending):
+            yield _completed(done)
+
+
+def _completed(done):
+    """
+    Waits for the next finished task, re-raising what went wrong outside the solver.
+    """
+    outcome = done.get()
+    if isinstance(outcome, BaseException):
+        raise outcome
+    return outcome
@@ -0,0 +1,265 @@
+import argparse
+import glob
+import json
+import math
+import os
+import platform
+import sys
+import time
+from statistics import median
+from CDCL import CDCL
+from cube_and_conquer import SPLITTERS, cube_and_conquer
+from DPLL import DPLL, parse_cnf
+from JW import JW
+from sudoku_codec import read_puzzles
+from sudoku_encoding import encode_sudoku
+
+# Benchmark sets by name: a glob of CNF files, or a puzzle file encoded in
+# memory with sudoku_encoding (there are no 16x16 files in output_cnfs)
+SETS = {
+    "4x4": "output_cnfs/4x4_*.cnf",
+    "9x9": "output_cnfs/9x9_*.cnf",
+    "9x9-hard": "output_cnfs/9x9-hard_*.cnf",
+    "16x16": "16x16.txt",
+}
+SOLVERS = {"CDCL": CDCL, "DPLL": DPLL, "JW": JW}
+
+
+def load_set(source, limit=None):
+    """
+    Returns the formulas of a benchmark set as ClauseStores, with a name for each.
+    """
+    if source.endswith(".txt"):
+        grids = read_puzzles(source)[:limit]
+        return [(f"{source}:{index + 1}", encode_sudoku(grid)[0]) for index, grid in enumerate(grids)]
+    files = sorted(glob.glob(source))[:limit]
+    return [(file_path, parse_cnf(file_path, compact=True)[0]) for file_path in files]
+
+
+def time_solve(solver_class, store, heuristic=None, **limits):
+    """
+    Builds a solver on the store and runs its search, timed with
+    perf_counter_ns. The timed region is solver construction, search and the
+    model, not the printing of solve(). Limits (time_limit, max_decisions,
+    max_conflicts) go to the solver. Returns the solver, the result (None if
+    a limit stopped it) and the nanoseconds taken.
+    """
+    if heuristic is not None:
+        limits["heuristic"] = heuristic
+    start = time.perf_counter_ns()
+    solver = solver_class(store, **limits)
+    result = solver.__solve__()
+    solver.propagator.model()
+    return solver, result, time.perf_counter_ns() - start
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(times_ns):
+    """
+    Returns the median, p95 and p99 in milliseconds and the throughput in
+    solves per second of per-formula times in nanoseconds.
+    """
+    return {
+        "median_ms": median(times_ns) / 1e6,
+        "p95_ms": percentile(times_ns, 0.95) / 1e6,
+        "p99_ms": percentile(times_ns, 0.99) / 1e6,
+        "throughput": len(times_ns) / (sum(times_ns) / 1e9) if sum(times_ns) else float("inf"),
+    }
+
+
+def benchmark_set(solver_class, formulas, heuristic=None, warmup=1, repeat=5, time_limit=None):
+    """
+    Times a solver on every formula of a set: `warmup` untimed runs of the
+    first formula, then `repeat` timed runs of each, keeping the median per
+    formula. Formulas not decided within `time_limit` seconds count as
+    unknown, at the time they took. Returns the summary over formulas with
+    the evaluations and the per-formula medians.
+    """
+    for _ in range(warmup):
+        if formulas:
+            time_solve(solver_class, formulas[0][1], heuristic, time_limit=time_limit)
+    times_ns = []
+    evaluations = 0
+    unsatisfiable = 0
+    unknown = 0
+    for _, store in formulas:
+        runs = [time_solve(solver_class, store, heuristic, time_limit=time_limit) for _ in range(repeat)]
+        times_ns.append(median(elapsed for _, _, elapsed in runs))
+        solver, result, _ = runs[0]
+        evaluations += solver.num_evaluations
+        unsatisfiable += result is False
+        unknown += result is None
+    summary = summarize(times_ns) if times_ns else {}
+    summary.update(formulas=len(formulas), evaluations=evaluations, unsatisfiable=unsatisfiable, unknown=unknown,
+                   times_ns=[int(elapsed) for elapsed in times_ns])
+    return summary
+
+
+def benchmark_speedup(solver_name, formulas, workers, depth=None, splitter="jw", repeat=3, time_limit=None):
+    """
+    Times every formula of a set on one core (time_solve) and with
+    cube_and_conquer on `workers` processes, `repeat` runs each, keeping
+    the median per formula. The parallel time includes splitting and
+    starting the pool. Returns both summaries, the median of the
+    per-formula speedups and the speedup on the total time.
+    """
+    single_ns = []
+    parallel_ns = []
+    cubes = 0
+    for _, store in formulas:
+        single_ns.append(median(time_solve(SOLVERS[solver_name], store, time_limit=time_limit)[2]
+                                for _ in range(repeat)))
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            result = cube_and_conquer(store, solver_name, workers, depth, splitter, time_limit)
+            runs.append(time.perf_counter_ns() - start)
+        parallel_ns.append(median(runs))
+        cubes += result["stats"]["cubes"]
+    return {
+        "solver": solver_name, "workers": workers, "depth": depth, "splitter": splitter,
+        "formulas": len(formulas), "cubes": cubes,
+        "single": summarize(single_ns), "parallel": summarize(parallel_ns),
+        "speedup_median": median(single / parallel for single, parallel in zip(single_ns, parallel_ns)),
+        "speedup_total": sum(single_ns) / sum(parallel_ns),
+    }
+
+
+def run_benchmarks(sets, solvers, heuristic=None, warmup=1, repeat=5, limit=None, time_limit=None):
+    """
+    Benchmarks every solver on every set. Returns the report: the settings
+    and machine, and one entry per solver and set.
+    """
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "warmup": warmup, "repeat": repeat, "limit": limit, "time_limit": time_limit,
+        "results": [],
+    }
+    for set_name in sets:
+        formulas = load_set(SETS[set_name], limit)
+        if not formulas:
+            print(f"{set_name}: no formulas found at {SETS[set_name]}", file=sys.stderr)
+            continue
+        for solver_name in solvers:
+            summary = benchmark_set(SOLVERS[solver_name], formulas, heuristic, warmup, repeat, time_limit)
+            summary.update(solver=solver_name, set=set_name)
+            report["results"].append(summary)
+            print(format_row(summary), file=sys.stderr)
+    return report
+
+
+def format_row(summary):
+    return (f"{summary['solver']:5} {summary['set']:9} {summary['formulas']:4} formulas  "
+            f"median {summary['median_ms']:9.2f} ms  p95 {summary['p95_ms']:9.2f} ms  "
+            f"p99 {summary['p99_ms']:9.2f} ms  {summary['throughput']:8.1f} solves/s"
+            + (f"  {summary['unknown']} unknown" if summary.get("unknown") else ""))
+
+
+def format_speedup(set_name, summary):
+    return (f"{summary['solver']:5} {set_name:9} {summary['formulas']:4} formulas  "
+            f"single {summary['single']['median_ms']:9.2f} ms  "
+            f"{summary['workers']} workers {summary['parallel']['median_ms']:9.2f} ms  "
+            f"speedup median {summary['speedup_median']:5.2f}x  total {summary['speedup_total']:5.2f}x")
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Compares the median and p95 of two reports per solver and set. Returns
+    the lines of the comparison and whether any time grew by more than
+    `threshold` (0.1 is 10%).
+    """
+    before = {(entry["solver"], entry["set"]): entry for entry in baseline["results"]}
+    lines = []
+    regressed = False
+    for entry in current["results"]:
+        key = (entry["solver"], entry["set"])
+        if key not in before:
+            lines.append(f"{key[0]:5} {key[1]:9} new")
+            continue
+        changes = []
+        for metric in ("median_ms", "p95_ms"):
+            ratio = entry[metric] / before[key][metric] if before[key][metric] else float("inf")
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = " REGRESSION"
+                regressed = True
+            changes.append(f"{metric[:-3]} {before[key][metric]:9.2f} -> {entry[metric]:9.2f} ms "
+                           f"({ratio - 1:+7.1%}){flag}")
+        lines.append(f"{key[0]:5} {key[1]:9} " + "  ".join(changes))
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the solvers on the Sudoku sets.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time the solvers and write a report")
+    run_parser.add_argument("--sets", nargs="+", default=list(SETS), choices=list(SETS))
+    run_parser.add_argument("--solvers", nargs="+", default=list(SOLVERS), choices=list(SOLVERS))
+    run_parser.add_argument("--heuristic", help="branching heuristic, defaults to each solver's own")
+    run_parser.add_argument("--warmup", type=int, default=1, help="untimed runs before each solver and set")
+    run_parser.add_argument("--repeat", type=int, default=5, help="timed runs per formula")
+    run_parser.add_argument("--limit", type=int, help="formulas per set")
+    run_parser.add_argument("--time-limit", type=float, help="seconds per solve before it counts as unknown")
+    run_parser.add_argument("--output", default="benchmark.json")
+
+    speedup_parser = commands.add_parser("speedup", help="time cube-and-conquer against one core")
+    speedup_parser.add_argument("--sets", nargs="+", default=["16x16"], choices=list(SETS))
+    speedup_parser.add_argument("--solvers", nargs="+", default=["CDCL"], choices=list(SOLVERS))
+    speedup_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    speedup_parser.add_argument("--depth", type=int, help="branchings per cube, see cube_and_conquer")
+    speedup_parser.add_argument("--splitter", default="jw", choices=SPLITTERS)
+    speedup_parser.add_argument("--repeat", type=int, default=3, help="timed runs per formula and mode")
+    speedup_parser.add_argument("--limit", type=int, help="formulas per set")
+    speedup_parser.add_argument("--time-limit", type=float, help="seconds per solve before it counts as unknown")
+    speedup_parser.add_argument("--output", default="speedup.json")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown, 0.1 for 10%%")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_benchmarks(args.sets, args.solvers, args.heuristic, args.warmup, args.repeat, args.limit,
+                                args.time_limit)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Results saved to {args.output}", file=sys.stderr)
+    elif args.command == "speedup":
+        report = {"python": platform.python_version(), "machine": platform.platform(), "cpus": os.cpu_count(),
+                  "created": time.strftime("%Y-%m-%d %H:%M:%S"), "repeat": args.repeat, "limit": args.limit,
+                  "results": []}
+        for set_name in args.sets:
+            formulas = load_set(SETS[set_name], args.limit)
+            for solver_name in args.solvers:
+                summary = benchmark_speedup(solver_name, formulas, args.workers, args.depth, args.splitter,
+                                            args.repeat, args.time_limit)
+                summary["set"] = set_name
+                report["results"].append(summary)
+                print(format_speedup(set_name, summary), file=sys.stderr)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Results saved to {args.output}", file=sys.stderr)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        lines, regressed = compare(baseline, current, args.threshold)
+        print("\n".join(lines))
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import time
+import tracemalloc
+from statistics import median
+from CDCL import parse_cnf, CDCL
+from DPLL import DPLL
+from JW import JW
+
+SOLVERS = {
+    "CDCL": CDCL,
+    "DPLL": DPLL,
+    "JW": JW,
+}
+
+
+def measure_solve(solver_class, cnf_file):
+    """
+    Solves one CNF file and returns the memory held by the solver after setup,
+    the peak allocated on top of that during the search (both in bytes) and
+    the time taken. Parsing happens before tracing starts.
+    """
+    clauses, num_vars = parse_cnf(cnf_file)
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver = solver_class(clauses)
+        setup, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        solver.solve()
+    time_taken = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return setup, peak - setup, time_taken
+
+
+def run_memory_benchmark(cnf_files, solver_names):
+    """
+    Measures every solver on every CNF file.
+    Returns {solver: {file: {"setup_bytes": ..., "peak_bytes": ..., "time_taken": ...}}}.
+    """
+    results = {}
+    for solver_name in solver_names:
+        results[solver_name] = {}
+        for cnf_file in cnf_files:
+            setup, peak, time_taken = measure_solve(SOLVERS[solver_name], cnf_file)
+            results[solver_name][cnf_file] = {"setup_bytes": setup, "peak_bytes": peak, "time_taken": time_taken}
+            print(f"{solver_name:5} {cnf_file:40} setup {setup / 2**20:6.2f} MiB  "
+                  f"search peak {peak / 2**20:8.2f} MiB  {time_taken:7.3f} s")
+    return results
+
+
+def print_summary(results, baseline=None):
+    """
+    Prints the median memory per solver, next to a baseline run if given.
+    """
+    print("\nMedian memory per solve (setup / search peak):")
+    for solver_name, runs in results.items():
+        line = f"  {solver_name:5} {format_medians(runs.values())}"
+        if baseline and solver_name in baseline:
+            shared = [f for f in runs if f in baseline[solver_name]]
+            if shared:
+                line += f"   before: {format_medians(baseline[solver_name][f] for f in shared)}"
+        print(line)
+
+
+def format_medians(runs):
+    """
+    Formats the median setup memory, search peak and time of a set of runs.
+    """
+    runs = list(runs)
+    setup = median(run.get("setup_bytes", 0) for run in runs)
+    peak = median(run["peak_bytes"] for run in runs)
+    seconds = median(run["time_taken"] for run in runs)
+    return f"{setup / 2**20:6.2f} / {peak / 2**20:6.2f} MiB in {seconds:6.3f} s"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak memory allocated per solve.")
+    parser.add_argument("pattern", nargs="?", default="output_cnfs/9x9-hard_*.cnf")
+    parser.add_argument("--solvers", nargs="+", default=list(SOLVERS), choices=list(SOLVERS))
+    parser.add_argument("--limit", type=int, default=10, help="number of CNF files to run")
+    parser.add_argument("--save", help="write the measurements to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    cnf_files = sorted(glob.glob(args.pattern))[:args.limit]
+    results = run_memory_benchmark(cnf_files, args.solvers)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_summary(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=4)
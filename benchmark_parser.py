@@ -0,0 +1,87 @@
+import argparse
+import glob
+import time
+from statistics import median
+from dimacs_parser import load_dimacs, parse_dimacs
+
+
+def parse_lines(filename):
+    """
+    Reference line-by-line parser, as parse_cnf in CDCL.py/DPLL.py used to read files.
+    """
+    clauses = {}
+    num_vars = 0
+    with open(filename, 'r') as f:
+        clause_idx = 0
+        for line in f:
+            if line.startswith('c'):
+                continue
+            elif line.startswith('p cnf'):
+                parts = line.strip().split()
+                num_vars = int(parts[2])
+            else:
+                clause = [int(x) for x in line.strip().split() if x != '0']
+                if clause:
+                    clauses[clause_idx] = clause
+                    clause_idx += 1
+    return clauses, num_vars
+
+
+def parse_readlines(file_path):
+    """
+    Reference readlines() parser, as dimacs_parser.parse_dimacs used to read files.
+    Literals ending in 0 are stripped by rstrip(' 0'), so its clauses can differ.
+    """
+    with open(file_path, 'r') as f:
+        lines = f.readlines()
+
+    clauses = []
+    num_vars = 0
+
+    for line in lines:
+        line = line.strip()
+        if line == '' or line.startswith('c'):
+            continue
+        elif line.startswith('p'):
+            parts = line.split()
+            num_vars = int(parts[2])
+        else:
+            clause = list(map(int, line.rstrip(' 0').split()))
+            clauses.append(clause)
+
+    return num_vars, clauses
+
+
+PARSERS = {
+    "lines": parse_lines,
+    "readlines": parse_readlines,
+    "parse_dimacs": parse_dimacs,
+    "load_dimacs": load_dimacs,
+}
+
+
+def time_parser(parser, filename, repeat):
+    """
+    Returns the median time of parsing a file `repeat` times.
+    """
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        parser(filename)
+        times.append(time.perf_counter() - start_time)
+    return median(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the DIMACS parsers on the same files.")
+    parser.add_argument("patterns", nargs="*", default=["sudoku-rules-16x16.txt", "sudoku-rules-9x9.txt",
+                                                        "output_cnfs/9x9-hard_1.cnf"])
+    parser.add_argument("--parsers", nargs="+", default=list(PARSERS), choices=list(PARSERS))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per parser and file")
+    args = parser.parse_args()
+
+    files = [f for pattern in args.patterns for f in sorted(glob.glob(pattern))]
+    print(f"{'file':40}" + "".join(f"{name:>14}" for name in args.parsers))
+    for filename in files:
+        seconds = [time_parser(PARSERS[name], filename, args.repeat) for name in args.parsers]
+        print(f"{filename:40}" + "".join(f"{s * 1000:11.1f} ms" for s in seconds))
@@ -0,0 +1,116 @@
+import argparse
+import contextlib
+import glob
+import io
+import sys
+import time
+from statistics import median
+from DPLL import DPLL, parse_cnf
+from JW import JW
+
+
+def recursive_solve(self):
+    """
+    Reference recursive search, as DPLL.__solve__ used to be: one Python call
+    per decision, trying the decision and then its negation.
+    """
+    self.num_evaluations += 1
+
+    if not self.__simplify__():
+        self.num_backtracking += 1
+        return False
+
+    satisfied = self.__is_satisfied__()
+    if satisfied is not None:
+        return satisfied
+
+    decision = self.__choose_next_literal__()
+    if decision is None:
+        return True
+
+    level = self.propagator.decision_level()
+    for literal in [decision, decision ^ 1]:
+        self.propagator.new_decision_level()
+        self.propagator.assign(literal)
+        if self.__solve__():
+            return True
+        self.__backtrack__(level)
+        self.num_backtracking += 1
+
+    return False
+
+
+class RecursiveDPLL(DPLL):
+    __solve__ = recursive_solve
+
+
+class RecursiveJW(JW):
+    __solve__ = recursive_solve
+
+
+SEARCHES = {
+    "DPLL": (RecursiveDPLL, DPLL),
+    "JW": (RecursiveJW, JW),
+}
+
+
+def run(solver_class, clauses):
+    """
+    Solves quietly. Returns the seconds taken, the evaluations and everything
+    the search decided, to check that both searches agree.
+    """
+    solver = solver_class(clauses)
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result, assignments, evals, backtracks = solver.solve()
+    return time.perf_counter() - start_time, evals, (result, assignments, evals, backtracks)
+
+
+def independent_choices(depth):
+    """
+    Returns clauses (x or y) over distinct variables. Nothing propagates and
+    pure literals are off, so every variable takes a decision and the search
+    is `depth` decisions deep with almost no work per node.
+    """
+    return {index: [2 * index + 1, 2 * index + 2] for index in range(depth // 2)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the recursive and the iterative search loop.")
+    parser.add_argument("patterns", nargs="*", default=["output_cnfs/9x9-hard_*.cnf"])
+    parser.add_argument("--solvers", nargs="+", default=list(SEARCHES), choices=list(SEARCHES))
+    parser.add_argument("--limit", type=int, default=10, help="files per pattern")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per solver and file")
+    parser.add_argument("--depths", type=int, nargs="+", default=[800, 5000], help="decisions in the deep-search checks")
+    args = parser.parse_args()
+
+    files = [f for pattern in args.patterns for f in sorted(glob.glob(pattern))[:args.limit]]
+    formulas = [parse_cnf(f)[0] for f in files]
+    for name in args.solvers:
+        recursive_class, iterative_class = SEARCHES[name]
+        totals = {}
+        for label, solver_class in (("recursive", recursive_class), ("iterative", iterative_class)):
+            seconds = 0.0
+            evaluations = 0
+            outcomes = []
+            for clauses in formulas:
+                runs = [run(solver_class, clauses) for _ in range(args.repeat)]
+                seconds += median(run_time for run_time, _, _ in runs)
+                evaluations += runs[0][1]
+                outcomes.append(runs[0][2])
+            totals[label] = seconds, evaluations, outcomes
+            print(f"{name:5} {label:10} {seconds:8.2f} s {evaluations:8} evaluations "
+                  f"{seconds / max(evaluations, 1) * 1e6:8.1f} us per evaluation")
+        same = totals["recursive"][2] == totals["iterative"][2]
+        print(f"{name:5} identical results: {same}")
+
+        for depth in args.depths:
+            clauses = independent_choices(depth)
+            for label, solver_class in (("recursive", recursive_class), ("iterative", iterative_class)):
+                try:
+                    seconds = median(run(solver_class, clauses)[0] for _ in range(args.repeat))
+                    print(f"{name:5} {label:10} {depth}-deep search: {seconds * 1000:7.1f} ms, "
+                          f"{seconds / depth * 1e6:5.1f} us per decision")
+                except RecursionError:
+                    print(f"{name:5} {label:10} {depth}-deep search: RecursionError "
+                          f"(limit {sys.getrecursionlimit()})")
@@ -0,0 +1,45 @@
+import time
+
+
+class Budget:
+    """
+    Limits on one search: wall-clock seconds, decisions and conflicts.
+
+    The solvers check it once per evaluation at the top of their search
+    loop and give up with an UNKNOWN status when a limit is reached, keeping
+    the statistics gathered so far. The clock starts when the search starts,
+    not when the solver is built. A solver built without limits has no
+    budget and only tests for None.
+    """
+
+    def __init__(self, time_limit=None, max_decisions=None, max_conflicts=None):
+        self.time_limit = time_limit
+        self.max_decisions = max_decisions
+        self.max_conflicts = max_conflicts
+        self.deadline = None
+
+    @classmethod
+    def from_limits(cls, time_limit=None, max_decisions=None, max_conflicts=None):
+        """
+        Returns a budget with the given limits, or None if there are none.
+        """
+        if time_limit is None and max_decisions is None and max_conflicts is None:
+            return None
+        return cls(time_limit, max_decisions, max_conflicts)
+
+    def start(self):
+        if self.time_limit is not None:
+            self.deadline = time.perf_counter() + self.time_limit
+
+    def exhausted(self, solver):
+        """
+        Returns the limit a solver has reached ("time", "decisions" or
+        "conflicts"), or None while it may carry on.
+        """
+        if self.max_conflicts is not None and solver.num_conflicts >= self.max_conflicts:
+            return "conflicts"
+        if self.max_decisions is not None and solver.num_decisions >= self.max_decisions:
+            return "decisions"
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return "time"
+        return None
@@ -0,0 +1,127 @@
+from array import array
+
+
+class ClauseStore:
+    """
+    Compact clause database.
+
+    All literals live in one flat `array('i')` buffer. Clause i occupies
+    literals[offsets[i]:offsets[i] + lengths[i]]. Variables are renumbered
+    densely to 0..n-1 in increasing DIMACS order and a literal is encoded as
+    2*v for the positive and 2*v+1 for the negative literal, so literal codes
+    are 0..2n-1, `code ^ 1` is the negation and `code >> 1` the variable.
+    """
+
+    def __init__(self, variables=()):
+        self.literals = array('i')
+        self.offsets = array('i')
+        self.lengths = array('i')
+        self.var_ids = []  # Dense variable -> DIMACS variable
+        self.var_index = {}  # DIMACS variable -> dense variable
+        for var in sorted(variables):
+            self.add_variable(var)
+
+    @classmethod
+    def from_clauses(cls, clauses):
+        """
+        Builds a store from a dict (or any iterable) of DIMACS literal lists.
+        """
+        if isinstance(clauses, dict):
+            clauses = clauses.values()
+        clauses = list(clauses)
+        store = cls({abs(literal) for clause in clauses for literal in clause})
+        for clause in clauses:
+            store.add_clause(clause)
+        return store
+
+    @classmethod
+    def from_codes(cls, var_ids, literals, offsets, lengths):
+        """
+        Builds a store from already encoded buffers: the sorted DIMACS
+        variables and anything array('i') accepts for the other three,
+        including raw machine-int bytes.
+        """
+        store = cls()
+        store.var_ids = list(var_ids)
+        store.var_index = {var: index for index, var in enumerate(store.var_ids)}
+        store.literals = array('i', literals)
+        store.offsets = array('i', offsets)
+        store.lengths = array('i', lengths)
+        return store
+
+    def copy(self):
+        """
+        Returns an independent copy, for solvers that reorder or add clauses.
+        """
+        return ClauseStore.from_codes(self.var_ids, self.literals, self.offsets, self.lengths)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def num_vars(self):
+        return len(self.var_ids)
+
+    def add_variable(self, var):
+        """
+        Returns the dense index of a DIMACS variable, registering it if needed.
+        """
+        index = self.var_index.get(var)
+        if index is None:
+            index = len(self.var_ids)
+            self.var_index[var] = index
+            self.var_ids.append(var)
+        return index
+
+    def encode(self, literal):
+        """
+        Returns the code of a DIMACS literal.
+        """
+        if literal > 0:
+            return 2 * self.add_variable(literal)
+        return 2 * self.add_variable(-literal) + 1
+
+    def decode(self, code):
+        """
+        Returns the DIMACS literal of a code.
+        """
+        var = self.var_ids[code >> 1]
+        return -var if code & 1 else var
+
+    def add_clause(self, clause):
+        """
+        Appends a clause of DIMACS literals and returns its index.
+        """
+        return self.add_codes([self.encode(literal) for literal in clause])
+
+    def add_codes(self, codes):
+        """
+        Appends a clause of literal codes and returns its index.
+        """
+        self.offsets.append(len(self.literals))
+        self.lengths.append(len(codes))
+        self.literals.extend(codes)
+        return len(self.offsets) - 1
+
+    def truncate(self, count):
+        """
+        Drops every clause from index `count` on and frees their literals.
+        """
+        if count < len(self.offsets):
+            del self.literals[self.offsets[count]:]
+            del self.offsets[count:]
+            del self.lengths[count:]
+
+    def clause(self, index):
+        """
+        Returns the literal codes of a clause as a new list.
+        """
+        start = self.offsets[index]
+        return self.literals[start:start + self.lengths[index]].tolist()
+
+    def to_clauses(self):
+        """
+        Returns the clauses as a dict of DIMACS literal lists, like parse_cnf does.
+        """
+        return {index: [self.decode(code) for code in self.clause(index)] for index in range(len(self))}
+
@@ -1,4 +1,4 @@
-import random
+from sudoku_codec import iter_puzzles, read_rules, write_rules_cnf
 
 def generate_sudoku_cnf(puzzle, rules_file, output_file):
     """
@@ -8,30 +8,7 @@ def generate_sudoku_cnf(puzzle, rules_file, output_file):
     :param rules_file: Path to the file containing Sudoku rules in CNF.
     :param output_file: Path to the output CNF file.
     """
-    with open(rules_file, 'r') as rf:
-        rules = rf.readlines()
-    
-    # Extract problem definition and base rules
-    p_line = rules[0]
-    base_rules = rules[1:]
-    
-    # Add puzzle-specific constraints
-    puzzle_clauses = []
-    for r in range(9):
-        for c in range(9):
-            if puzzle[r][c] != 0:
-                variable = 100 * (r + 1) + 10 * (c + 1) + puzzle[r][c]
-                puzzle_clauses.append(f"{variable} 0\n")
-    
-    # Update number of clauses
-    total_clauses = len(base_rules) + len(puzzle_clauses)
-    p_line = f"p cnf 999 {total_clauses}\n"
-    
-    # Write to output file
-    with open(output_file, 'w') as of:
-        of.write(p_line)
-        of.writelines(base_rules)
-        of.writelines(puzzle_clauses)
+    write_rules_cnf(puzzle, read_rules(rules_file), output_file)
 
 def parse_sudoku_txt(file_path):
     """
@@ -40,16 +17,7 @@ def parse_sudoku_txt(file_path):
     :param file_path: Path to the TXT file containing Sudoku puzzles as single lines.
     :return: List of 9x9 grids (each grid is a list of lists).
     """
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-    
-    puzzles = []
-    for line in lines:
-        line = line.strip()
-        if len(line) == 81:  # Ensure valid 9x9 grid
-            grid = [[int(c) if c.isdigit() else 0 for c in line[i:i+9]] for i in range(0, 81, 9)]
-            puzzles.append(grid)
-    return puzzles
+    return list(iter_puzzles(file_path, 9))
 
 # Example usage
 def main():
@@ -57,13 +25,13 @@ def main():
     rules_file = "sudoku-rules-9x9.txt"  # Sudoku rules in CNF format
     output_folder = "output_cnfs/"  # Folder to save CNF files
 
-    # Parse Sudoku puzzles from TXT file
-    puzzles = parse_sudoku_txt(txt_file)
+    # Read the rules once, then stream the puzzles from the TXT file
+    rules = read_rules(rules_file)
 
     # Generate CNF for each puzzle
-    for idx, puzzle in enumerate(puzzles):
+    for idx, puzzle in enumerate(iter_puzzles(txt_file, 9)):
         output_file = f"{output_folder}9x9-hard_{idx + 1}.cnf"
-        generate_sudoku_cnf(puzzle, rules_file, output_file)
+        write_rules_cnf(puzzle, rules, output_file)
         print(f"Generated CNF for Sudoku {idx + 1}: {output_file}")
 
 if __name__ == "__main__":
@@ -0,0 +1,250 @@
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from JW import JW
+from solve_result import SATISFIABLE, UNKNOWN, UNSATISFIABLE
+from solver_api import load_store, solve_formula
+from sudoku_codec import read_puzzles
+
+SPLITTERS = ("jw", "lookahead")
+LOOKAHEAD_CANDIDATES = 8  # Best JW variables the lookahead splitter tries both ways
+REFUTED = -1  # No literal to branch on: the node has a conflict
+
+
+class Splitter:
+    """
+    Cuts the search space of a formula into cubes: partial assignments
+    whose branches together cover every assignment the formula allows.
+
+    The cube tree is explored with a JW solver's propagator and scores,
+    branching both ways on a variable and propagating, down to a fixed
+    number of branchings. Branches that propagation refutes are dropped, so
+    the cubes left are only the ones propagation cannot decide. "jw" branches
+    on the best two-sided Jeroslow-Wang variable, "lookahead" propagates
+    both literals of the LOOKAHEAD_CANDIDATES best ones and takes the one
+    whose two branches assign the most; a literal that fails this way is a
+    failed literal, and its negation is asserted and added to the cube.
+    """
+
+    def __init__(self, store, splitter="jw"):
+        if splitter not in SPLITTERS:
+            raise ValueError(f"Unknown splitter '{splitter}', expected one of {list(SPLITTERS)}")
+        self.splitter = splitter
+        self.solver = JW(store)
+        self.propagator = self.solver.propagator
+        self.store = self.propagator.store
+        self.refuted = 0
+        self.lookaheads = 0
+
+    def __branch(self, literal):
+        propagator = self.propagator
+        propagator.new_decision_level()
+        propagator.assign(literal)
+        return propagator.propagate()
+
+    def __undo(self, level):
+        self.solver.__backtrack__(level)
+
+    def __lookahead(self, cube):
+        """
+        Returns the literal to branch on after testing the best JW candidates
+        both ways, None if every variable is assigned or REFUTED. Failed
+        literals found on the way are asserted at the current level and
+        appended to the cube.
+        """
+        propagator = self.propagator
+        while True:
+            candidates = []
+            while len(candidates) < LOOKAHEAD_CANDIDATES:
+                literal = self.solver.__choose_next_literal__()
+                if literal is None:
+                    break
+                candidates.append(literal)
+            self.solver.scores.reinsert(literal >> 1 for literal in candidates)
+            if not candidates:
+                return None
+
+            best = None
+            best_score = -1
+            level = propagator.decision_level()
+            for literal in candidates:
+                counts = []
+                for branch in (literal, literal ^ 1):
+                    size = len(propagator.trail)
+                    self.lookaheads += 1
+                    consistent = self.__branch(branch)
+                    counts.append(len(propagator.trail) - size if consistent else None)
+                    self.__undo(level)
+                if None in counts:
+                    break
+                score = (counts[0] + 1) * (counts[1] + 1)
+                if score > best_score:
+                    best = literal
+                    best_score = score
+            else:
+                return best
+
+            # A failed literal: its negation holds in this node
+            if counts[0] is None and counts[1] is None:
+                return REFUTED
+            failed = literal if counts[0] is None else literal ^ 1
+            propagator.assign(failed ^ 1)
+            cube.append(self.store.decode(failed ^ 1))
+            if not propagator.propagate():
+                return REFUTED
+
+    def __descend(self, cube, depth, cubes):
+        propagator = self.propagator
+        if not propagator.propagate():
+            self.refuted += 1
+            return
+        if depth == 0 or propagator.all_assigned():
+            cubes.append(cube)
+            return
+        if self.splitter == "lookahead":
+            cube = list(cube)
+            literal = self.__lookahead(cube)
+            if literal == REFUTED:
+                self.refuted += 1
+                return
+        else:
+            literal = self.solver.__choose_next_literal__()
+        if literal is None:
+            cubes.append(cube)
+            return
+        level = propagator.decision_level()
+        for branch in (literal, literal ^ 1):
+            propagator.new_decision_level()
+            propagator.assign(branch)
+            self.__descend(cube + [self.store.decode(branch)], depth - 1, cubes)
+            self.__undo(level)
+
+    def split(self, depth):
+        """
+        Returns the cubes, lists of DIMACS literals, of the tree cut `depth`
+        branchings deep (at most 2^depth of them), positive branches first.
+        An empty list means propagation refuted the whole formula.
+        """
+        cubes = []
+        if not self.propagator.inconsistent:
+            self.__descend([], depth, cubes)
+        else:
+            self.refuted += 1
+        return cubes
+
+
+# Per-worker state, set up once by _init_worker
+_store = None
+_solver = None
+_options = None
+_deadline = None
+
+
+def _init_worker(store, solver, options, deadline):
+    global _store, _solver, _options, _deadline
+    _store = store
+    _solver = solver
+    _options = options
+    _deadline = deadline
+
+
+def _solve_cube(task):
+    """
+    Solves the formula under one cube inside a worker, the cube's literals
+    added as unit clauses to a copy of the formula. Returns the cube's index
+    and result dict.
+    """
+    index, cube = task
+    formula = _store.copy()
+    for literal in cube:
+        formula.add_clause([literal])
+    options = dict(_options)
+    if _deadline is not None:
+        options["time_limit"] = max(_deadline - time.time(), 0)
+    return index, solve_formula(formula, _solver, **options).to_dict()
+
+
+def default_depth(workers):
+    """
+    Returns the branching depth that gives about four cubes per worker.
+    """
+    return max(math.ceil(math.log2(4 * workers)), 1)
+
+
+def cube_and_conquer(formula, solver="CDCL", workers=None, depth=None, splitter="jw", time_limit=None, **options):
+    """
+    Solves one formula on several cores: a Splitter cuts it into cubes,
+    then a pool of `workers` processes solves the formula under each cube
+    with the named solver (see solver_api.SOLVERS, the solvers taking CNF).
+    The first cube found satisfiable stops the pool; the formula is
+    unsatisfiable once every cube is. A time limit covers the whole solve,
+    the cubes still open when it runs out make the result UNKNOWN.
+
+    The formula is as for solver_api.make_solver and options go to the
+    solver. Returns a dict with the status, the model, stats (cubes, cubes
+    solved, branches refuted while splitting, summed evaluations, decisions
+    and conflicts of the cube solves) and timings ("split", "conquer" and
+    "total" in seconds).
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    depth = default_depth(workers) if depth is None else depth
+    store = load_store(formula)
+    cutter = Splitter(store, splitter)
+    cubes = cutter.split(depth)
+    split_time = time.perf_counter() - start
+
+    stats = {"cubes": len(cubes), "cubes_solved": 0, "refuted": cutter.refuted, "lookaheads": cutter.lookaheads,
+             "evaluations": 0, "decisions": 0, "conflicts": 0}
+    status = UNSATISFIABLE
+    model = {}
+    if cubes:
+        deadline = None if time_limit is None else time.time() + time_limit - split_time
+        with multiprocessing.Pool(min(workers, len(cubes)), initializer=_init_worker,
+                                  initargs=(store, solver, options, deadline)) as pool:
+            for index, result in pool.imap_unordered(_solve_cube, enumerate(cubes)):
+                stats["cubes_solved"] += 1
+                for counter in ("evaluations", "decisions", "conflicts"):
+                    stats[counter] += result["stats"][counter]
+                if result["status"] == SATISFIABLE:
+                    status = SATISFIABLE
+                    model = result["model"]
+                    stats["winning_cube"] = cubes[index]
+                    break
+                if result["status"] != UNSATISFIABLE:
+                    status = UNKNOWN
+            pool.terminate()
+    total = time.perf_counter() - start
+    return {"status": status, "model": model, "stats": stats,
+            "timings": {"split": split_time, "conquer": total - split_time, "total": total}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve one hard formula with cube-and-conquer on several cores.")
+    parser.add_argument("formula", help="a CNF file, or a line-per-puzzle text file with --puzzle")
+    parser.add_argument("--puzzle", type=int, help="number of the puzzle to solve from a text file, from 1")
+    parser.add_argument("--solver", default="CDCL", choices=["CDCL", "DPLL", "JW"])
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to the number of cores")
+    parser.add_argument("--depth", type=int, help="branchings per cube, defaults to about four cubes per worker")
+    parser.add_argument("--splitter", default="jw", choices=SPLITTERS)
+    parser.add_argument("--time-limit", type=float, help="seconds before the solve gives up as unknown")
+    args = parser.parse_args()
+
+    formula = args.formula
+    if args.puzzle is not None:
+        formula = read_puzzles(formula)[args.puzzle - 1]
+    result = cube_and_conquer(formula, args.solver, args.workers, args.depth, args.splitter, args.time_limit)
+    stats = result["stats"]
+    timings = result["timings"]
+    print(f"Status: {result['status']}")
+    print(f"Cubes: {stats['cubes']} ({stats['cubes_solved']} solved, {stats['refuted']} branches refuted "
+          f"while splitting)")
+    print(f"Time taken: {timings['total']:.2f} seconds (split {timings['split']:.2f}, "
+          f"conquer {timings['conquer']:.2f})")
+    print(f"Evaluations: {stats['evaluations']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,89 @@
 # dimacs_parser.py
-def parse_dimacs(file_path):
-    with open(file_path, 'r') as f:
-        lines = f.readlines()
-
-    clauses = []
-    num_vars = 0
-
-    for line in lines:
-        line = line.strip()
-        if line == '' or line.startswith('c'):  # Ignore comments and empty lines
-            continue
-        elif line.startswith('p'):  # Problem line
-            parts = line.split()
-            num_vars = int(parts[2])
-        else:  # Clause line
-            clause = list(map(int, line.rstrip(' 0').split()))
-            clauses.append(clause)
+import mmap
+import os
+import re
+import numpy as np
+from clause_store import ClauseStore
+
+# Comment, problem and SATLIB end-marker lines
+NON_CLAUSE_LINE = re.compile(rb'^[cp%].*$', re.MULTILINE)
+
+
+def read_literals(file_path):
+    """
+    Reads the clause section of a DIMACS file into one integer array.
+    The file is memory-mapped and every token is converted to an integer in a
+    single pass, clauses stay separated by their terminating zeros.
+    Returns the array and the number of variables declared in the header.
+    """
+    if os.path.getsize(file_path) == 0:
+        return np.zeros(0, dtype=np.int32), 0
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        num_vars = 0
+        header = data.find(b'p cnf')
+        if header >= 0:
+            end = data.find(b'\n', header)
+            num_vars = int(data[header:end if end >= 0 else len(data)].split()[2])
+        if data[:1] in (b'c', b'p', b'%') or re.search(rb'\n[cp%]', data):
+            body = NON_CLAUSE_LINE.sub(b'', data)
+        else:
+            body = data[:]
+    if not body.strip():
+        return np.zeros(0, dtype=np.int32), num_vars
+    return np.fromstring(body, dtype=np.int32, sep=' '), num_vars
+
+
+def split_clauses(tokens):
+    """
+    Splits zero-terminated DIMACS tokens into the literals without the zeros
+    and the offset and length of every clause in them. Empty clauses are
+    skipped and literals after the last zero form a final clause.
+    """
+    ends = np.flatnonzero(tokens == 0)
+    if tokens.size and tokens[-1] != 0:
+        ends = np.append(ends, tokens.size)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts
+    # Every zero before a clause shifts it left by one in the literal array
+    offsets = starts - np.arange(len(starts))
+    keep = lengths > 0
+    return tokens[tokens != 0], offsets[keep], lengths[keep]
 
+
+def load_dimacs(file_path):
+    """
+    Loads a DIMACS CNF file into a ClauseStore.
+    Returns the store and the number of variables declared in the header.
+    """
+    tokens, num_vars = read_literals(file_path)
+    return build_store(*split_clauses(tokens)), num_vars
+
+
+def build_store(literals, offsets, lengths):
+    """
+    Builds a ClauseStore from flat DIMACS literals and the offset and length
+    of every clause, renumbering the variables densely with vectorized
+    operations. Accepts numpy arrays or anything numpy can wrap.
+    """
+    literals = np.asarray(literals, dtype=np.int64)
+    variables = np.abs(literals)
+    present = np.zeros(int(variables.max(initial=0)) + 1, dtype=bool)
+    present[variables] = True
+    dense = np.cumsum(present) - 1
+    codes = 2 * dense[variables] + (literals < 0)
+    return ClauseStore.from_codes(np.flatnonzero(present).tolist(),
+                                  codes.astype(np.intc).tobytes(),
+                                  np.asarray(offsets).astype(np.intc).tobytes(),
+                                  np.asarray(lengths).astype(np.intc).tobytes())
+
+
+def parse_dimacs(file_path):
+    """
+    Parses a DIMACS CNF file into a list of clauses of DIMACS literals.
+    Returns the number of variables declared in the header and the clauses.
+    """
+    tokens, num_vars = read_literals(file_path)
+    literals, offsets, lengths = split_clauses(tokens)
+    literals = literals.tolist()
+    clauses = [literals[start:start + length] for start, length in zip(offsets.tolist(), lengths.tolist())]
     return num_vars, clauses
@@ -0,0 +1,176 @@
+class VarHeap:
+    """
+    Indexed binary max-heap of variables ordered by an external score list.
+    Each variable's position in the heap is tracked, so a variable whose score
+    changed can be moved in O(log n) without searching for it. Ties go to the
+    smaller variable.
+    """
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.heap = []
+        self.positions = [-1] * len(scores)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, var):
+        return self.positions[var] >= 0
+
+    def __better(self, a, b):
+        score_a = self.scores[a]
+        score_b = self.scores[b]
+        return score_a > score_b or (score_a == score_b and a < b)
+
+    def __sift_up(self, position):
+        heap = self.heap
+        positions = self.positions
+        var = heap[position]
+        while position > 0:
+            parent = (position - 1) >> 1
+            if not self.__better(var, heap[parent]):
+                break
+            heap[position] = heap[parent]
+            positions[heap[position]] = position
+            position = parent
+        heap[position] = var
+        positions[var] = position
+
+    def __sift_down(self, position):
+        heap = self.heap
+        positions = self.positions
+        size = len(heap)
+        var = heap[position]
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and self.__better(heap[child + 1], heap[child]):
+                child += 1
+            if not self.__better(heap[child], var):
+                break
+            heap[position] = heap[child]
+            positions[heap[position]] = position
+            position = child
+        heap[position] = var
+        positions[var] = position
+
+    def push(self, var):
+        """
+        Inserts a variable that is not in the heap yet.
+        """
+        if self.positions[var] >= 0:
+            return
+        self.heap.append(var)
+        self.__sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        """
+        Removes and returns the variable with the highest score.
+        """
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.positions[top] = -1
+        if heap:
+            heap[0] = last
+            self.__sift_down(0)
+        return top
+
+    def update(self, var):
+        """
+        Restores the heap order after the score of a variable changed.
+        """
+        position = self.positions[var]
+        if position >= 0:
+            self.__sift_up(position)
+            self.__sift_down(self.positions[var])
+
+
+class VarOrder:
+    """
+    Static branching order: the smallest unassigned variable is picked first.
+    Assigned variables are dropped from the heap lazily when they reach the
+    top and are put back when backtracking unassigns them.
+    """
+
+    name = "order"
+
+    def __init__(self, variables, num_slots):
+        self.activity = [0.0] * num_slots
+        self.heap = VarHeap(self.activity)
+        for var in variables:
+            self.heap.push(var)
+
+    def bump(self, var):
+        """
+        Rewards a variable involved in a conflict.
+        """
+
+    def decay(self):
+        """
+        Ages all activities after a conflict.
+        """
+
+    def next_variable(self, values):
+        """
+        Returns the best unassigned variable, or None if every variable is assigned.
+        `values` holds the truth of each literal code, as in WatchedPropagator.
+        """
+        heap = self.heap
+        while heap:
+            var = heap.pop()
+            if values[2 * var] is None:
+                return var
+        return None
+
+    def reinsert(self, literals):
+        """
+        Puts the variables of literals that were just unassigned back into the heap.
+        """
+        push = self.heap.push
+        for literal in literals:
+            push(literal >> 1)
+
+
+class VSIDS(VarOrder):
+    """
+    Variable State Independent Decaying Sum, in the exponential form used by
+    MiniSat (EVSIDS). Bumping adds the current increment to a variable's
+    activity and decaying grows the increment, which ages every activity at
+    once without touching them. Activities are rescaled before they overflow.
+    """
+
+    name = "vsids"
+
+    def __init__(self, variables, num_slots, decay=0.95):
+        super().__init__(variables, num_slots)
+        self.decay_factor = decay
+        self.increment = 1.0
+
+    def bump(self, var):
+        activity = self.activity
+        activity[var] += self.increment
+        if activity[var] > 1e100:
+            for i in range(len(activity)):
+                activity[i] *= 1e-100
+            self.increment *= 1e-100
+        self.heap.update(var)
+
+    def decay(self):
+        self.increment /= self.decay_factor
+
+
+HEURISTICS = {
+    VarOrder.name: VarOrder,
+    VSIDS.name: VSIDS,
+}
+
+
+def make_var_order(heuristic, propagator):
+    """
+    Builds the branching heuristic with the given name for the variables of a propagator.
+    """
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic '{heuristic}', expected one of {sorted(HEURISTICS)}")
+    return HEURISTICS[heuristic](propagator.variables, propagator.num_vars)
@@ -0,0 +1,180 @@
+import argparse
+import contextlib
+import cProfile
+import json
+import time
+from functools import wraps
+from CDCL import CDCL
+from DPLL import DPLL, parse_cnf
+from JW import JW
+from solve_result import run_solver
+
+SOLVERS = {"CDCL": CDCL, "DPLL": DPLL, "JW": JW}
+PHASES = ("parse", "propagate", "pure_literals", "decide", "analyze", "backtrack")
+
+# Per solver class, the methods timed as each phase (owner, attribute);
+# the owner is "solver", "propagator" or "occurrences". CDCL's own methods
+# are name-mangled. Pure literals are only timed if the solver looks for them.
+PHASE_METHODS = {
+    DPLL: [("propagator", "propagate", "propagate"),
+           ("occurrences", "pure_literals", "pure_literals"),
+           ("solver", "__choose_next_literal__", "decide"),
+           ("solver", "__backtrack__", "backtrack")],
+    CDCL: [("propagator", "propagate", "propagate"),
+           ("solver", "__choose_next_var__", "decide"),
+           ("solver", "_CDCL__analyze_conflict", "analyze"),
+           ("solver", "_CDCL__backtrack", "backtrack")],
+}
+
+
+class SolverProfile:
+    """
+    Optional instrumentation of a DPLL, JW or CDCL solver: time and call
+    count per phase, plus the propagator's propagation and clause visit
+    counters.
+
+    A solver built with profile=SolverProfile() hands itself to attach(),
+    which wraps the phase methods of that one instance with timers. Solvers
+    built without a profile run the class methods untouched, so the
+    instrumentation costs nothing when it is off; the propagator counters
+    are updated once per propagated literal, not per clause. Parsing
+    happens before there is a solver and is timed with phase("parse").
+
+    With cprofile=True, run() also records a cProfile of the solve, which
+    save_pstats writes in the format pstats and snakeviz read.
+    """
+
+    def __init__(self, cprofile=False):
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.solver = None
+        self.solve_seconds = 0.0
+        self.profiler = cProfile.Profile() if cprofile else None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Times a block of code as one call of a phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+    def __timed(self, method, name):
+        calls = self.calls
+        seconds = self.seconds
+        clock = time.perf_counter
+
+        @wraps(method)
+        def timed(*args):
+            start = clock()
+            try:
+                return method(*args)
+            finally:
+                seconds[name] += clock() - start
+                calls[name] += 1
+        return timed
+
+    def attach(self, solver):
+        """
+        Wraps the phase methods of one solver instance with timers.
+        """
+        self.solver = solver
+        owners = {"solver": solver, "propagator": solver.propagator,
+                  "occurrences": getattr(solver, "occurrences", None)}
+        methods = next(phases for solver_class, phases in PHASE_METHODS.items() if isinstance(solver, solver_class))
+        for owner_name, attribute, name in methods:
+            owner = owners[owner_name]
+            if owner is not None:
+                setattr(owner, attribute, self.__timed(getattr(owner, attribute), name))
+
+    def run(self):
+        """
+        Runs the attached solver quietly, under cProfile if enabled, and
+        returns its solve_result.SolveResult.
+        """
+        start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+        try:
+            return run_solver(self.solver)
+        finally:
+            if self.profiler is not None:
+                self.profiler.disable()
+            self.solve_seconds += time.perf_counter() - start
+
+    def to_dict(self):
+        """
+        Returns the phases and counters as plain data.
+        """
+        solver = self.solver
+        propagator = solver.propagator
+        propagate_seconds = self.seconds["propagate"]
+        return {
+            "solver": type(solver).__name__,
+            "heuristic": solver.heuristic,
+            "solve_seconds": self.solve_seconds,
+            "phases": {name: {"calls": self.calls[name], "seconds": self.seconds[name]} for name in PHASES},
+            "evaluations": solver.num_evaluations,
+            "backtracks": solver.num_backtracking,
+            "propagations": propagator.num_propagations,
+            "clause_visits": propagator.clause_visits,
+            "propagations_per_second": propagator.num_propagations / propagate_seconds if propagate_seconds else None,
+        }
+
+    def save_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def save_pstats(self, path):
+        """
+        Writes the cProfile of run() as a pstats file.
+        """
+        if self.profiler is None:
+            raise ValueError("Profile was created without cprofile=True")
+        self.profiler.dump_stats(path)
+
+    def report(self):
+        """
+        Returns a readable table of the phases and counters.
+        """
+        data = self.to_dict()
+        lines = [f"{'phase':14} {'calls':>10} {'seconds':>10}"]
+        for name, phase in data["phases"].items():
+            lines.append(f"{name:14} {phase['calls']:10} {phase['seconds']:10.4f}")
+        lines.append(f"propagations: {data['propagations']}, clause visits: {data['clause_visits']}")
+        if data["propagations_per_second"] is not None:
+            lines.append(f"propagations per second: {data['propagations_per_second']:.0f}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a CNF file and report where the time goes.")
+    parser.add_argument("cnf_file")
+    parser.add_argument("--solver", default="CDCL", choices=sorted(SOLVERS))
+    parser.add_argument("--heuristic", help="branching heuristic, defaults to the solver's own")
+    parser.add_argument("--json", help="write the phases and counters to this file")
+    parser.add_argument("--pstats", help="also run cProfile and write its stats to this file")
+    args = parser.parse_args()
+
+    profile = SolverProfile(cprofile=args.pstats is not None)
+    with profile.phase("parse"):
+        clauses, _ = parse_cnf(args.cnf_file, compact=True)
+    options = {"profile": profile}
+    if args.heuristic:
+        options["heuristic"] = args.heuristic
+    SOLVERS[args.solver](clauses, **options)
+    result = profile.run()
+    print(f"{result.status} in {profile.solve_seconds:.4f} seconds")
+    print(profile.report())
+    if args.json:
+        profile.save_json(args.json)
+    if args.pstats:
+        profile.save_pstats(args.pstats)
+
+
+if __name__ == "__main__":
+    main()
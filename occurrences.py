@@ -0,0 +1,97 @@
+class OccurrenceCounts:
+    """
+    Number of clauses not yet satisfied that each literal occurs in,
+    maintained along the propagator trail.
+
+    Every clause keeps a count of its true literals. When the first one
+    becomes true the clause is satisfied and the counts of all its literals
+    drop, when the last one is unassigned again they are restored, so an
+    assignment only visits the clauses its literal occurs in. A literal whose
+    count drops to zero makes its negation a pure literal candidate; the
+    candidates are checked when they are taken, which skips those that an
+    assignment or a backtrack has made stale since.
+
+    Only the original clauses are counted (learned clauses are implied by
+    them), and tautologies, which the propagator drops when it loads the
+    formula, are left out.
+    """
+
+    def __init__(self, propagator):
+        self.propagator = propagator
+        store = propagator.store
+        self.store = store
+        num_clauses = propagator.num_original
+
+        self.occurs = [[] for _ in range(2 * propagator.num_vars)]
+        for index in range(num_clauses):
+            if index not in propagator.tautologies:
+                for literal in store.clause(index):
+                    self.occurs[literal].append(index)
+        self.true_count = [0] * num_clauses
+        self.counts = [len(indices) for indices in self.occurs]
+        counts = self.counts
+        self.candidates = [literal for literal in range(len(counts)) if counts[literal] and not counts[literal ^ 1]]
+
+        self.synced = 0  # Number of trail entries already counted
+
+    def __assign(self, literal):
+        true_count = self.true_count
+        counts = self.counts
+        candidates = self.candidates
+        literals = self.store.literals
+        offsets = self.store.offsets
+        lengths = self.store.lengths
+        for index in self.occurs[literal]:
+            true_count[index] += 1
+            if true_count[index] == 1:
+                start = offsets[index]
+                for k in range(start, start + lengths[index]):
+                    other = literals[k]
+                    counts[other] -= 1
+                    if counts[other] == 0:
+                        candidates.append(other ^ 1)
+
+    def __unassign(self, literal):
+        true_count = self.true_count
+        counts = self.counts
+        literals = self.store.literals
+        offsets = self.store.offsets
+        lengths = self.store.lengths
+        for index in self.occurs[literal]:
+            true_count[index] -= 1
+            if true_count[index] == 0:
+                start = offsets[index]
+                for k in range(start, start + lengths[index]):
+                    counts[literals[k]] += 1
+
+    def sync(self):
+        """
+        Counts the trail entries assigned since the last call.
+        """
+        trail = self.propagator.trail
+        for position in range(self.synced, len(trail)):
+            self.__assign(trail[position])
+        self.synced = len(trail)
+
+    def backtrack(self, trail_size, unassigned):
+        """
+        Reverts the counted entries among the literals just popped from the trail,
+        which started at position trail_size.
+        """
+        for literal in unassigned[:max(self.synced - trail_size, 0)]:
+            self.__unassign(literal)
+        self.synced = min(self.synced, trail_size)
+
+    def pure_literals(self):
+        """
+        Returns the unassigned literals that occur in a clause not yet
+        satisfied while their negation occurs in none, among the candidates
+        found since the last call.
+        """
+        self.sync()
+        values = self.propagator.values
+        counts = self.counts
+        pure = [literal for literal in self.candidates
+                if values[literal] is None and counts[literal] and not counts[literal ^ 1]]
+        self.candidates = []
+        return pure
@@ -0,0 +1,195 @@
+import argparse
+import csv
+import glob
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from solve_result import ERROR, SATISFIABLE, UNKNOWN, UNSATISFIABLE
+from solver_api import is_grid, solve_formula
+from sudoku_codec import read_puzzles
+
+# Portfolio configurations by name: the solver and its options. The solvers
+# are deterministic, so CDCL is diversified by restart policy, heuristic and
+# phase saving rather than by random seed.
+CONFIGS = {
+    "cdcl-luby": ("CDCL", {"restarts": "luby"}),
+    "cdcl-glucose": ("CDCL", {"restarts": "glucose"}),
+    "cdcl-geometric": ("CDCL", {"restarts": "geometric"}),
+    "cdcl-order": ("CDCL", {"heuristic": "order"}),
+    "cdcl-no-phase": ("CDCL", {"phase_saving": False}),
+    "dpll": ("DPLL", {}),
+    "jw": ("JW", {}),
+}
+DEFAULT_CONFIGS = ["cdcl-luby", "cdcl-glucose", "cdcl-order", "jw"]
+DECIDED = (SATISFIABLE, UNSATISFIABLE)
+EXIT_GRACE = 5  # Seconds past the time limit before the race stops waiting for a worker
+FIELDS = ["puzzle", "size", "status", "winner", "time_taken", "evaluations", "backtracks"]
+
+
+def _run_config(results, name, formula, solver, options):
+    """
+    Solves the formula with one configuration inside a racing process and
+    puts (name, result dict) on the results queue, whatever happens.
+    """
+    try:
+        result = solve_formula(formula, solver, **options).to_dict()
+    except Exception as e:
+        result = {"status": ERROR, "model": {}, "stats": {"error": str(e)}, "timings": {}}
+    results.put((name, result))
+
+
+def grid_size(formula):
+    """
+    Returns the size label of a puzzle for the win statistics: the file name
+    up to its number for a CNF file ("9x9-hard" for output_cnfs/9x9-hard_3.cnf),
+    "NxN" for a grid, "cnf" otherwise.
+    """
+    if isinstance(formula, str):
+        return os.path.basename(formula).rsplit("_", 1)[0]
+    if is_grid(formula):
+        return f"{len(formula)}x{len(formula)}"
+    return "cnf"
+
+
+def race(formula, configs=None, time_limit=None):
+    """
+    Races configurations on the same formula, each in its own process, and
+    returns as soon as one of them decides it. The other processes are
+    terminated then.
+
+    The formula is as for solver_api.make_solver; configs are names of
+    CONFIGS (DEFAULT_CONFIGS if not given). With a time_limit, every
+    configuration gets it as its budget, and if none decides in time the
+    race is UNKNOWN. Returns a dict with the winner (None if no one
+    decided), status, model, stats and timings of the winner, the wall-clock
+    time_taken of the race and the status every configuration reached
+    ("CANCELLED" for those terminated).
+    """
+    configs = configs or DEFAULT_CONFIGS
+    for name in configs:
+        if name not in CONFIGS:
+            raise ValueError(f"Unknown configuration '{name}', expected one of {sorted(CONFIGS)}")
+    options = {} if time_limit is None else {"time_limit": time_limit}
+    deadline = None if time_limit is None else time.perf_counter() + time_limit + EXIT_GRACE
+
+    start = time.perf_counter()
+    results = multiprocessing.Queue()
+    processes = {}
+    for name in configs:
+        solver, config_options = CONFIGS[name]
+        process = multiprocessing.Process(target=_run_config, daemon=True,
+                                          args=(results, name, formula, solver, {**config_options, **options}))
+        process.start()
+        processes[name] = process
+
+    outcomes = {}
+    winner = None
+    while len(outcomes) < len(processes):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        try:
+            name, result = results.get(timeout=0.1)
+        except queue.Empty:
+            if all(not process.is_alive() for process in processes.values()) and results.empty():
+                break  # A worker died without reporting
+            continue
+        outcomes[name] = result
+        if result["status"] in DECIDED:
+            winner = name
+            break
+    time_taken = time.perf_counter() - start
+
+    for name, process in processes.items():
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    results.close()
+
+    race_result = {"winner": winner, "status": UNKNOWN, "model": {}, "stats": {}, "timings": {},
+                   "time_taken": time_taken,
+                   "configs": {name: outcomes[name]["status"] if name in outcomes else "CANCELLED"
+                               for name in configs}}
+    if winner is not None:
+        race_result.update(outcomes[winner])
+    return race_result
+
+
+def run_portfolio(puzzles, configs=None, time_limit=None):
+    """
+    Races the configurations on every puzzle in turn. Yields (puzzle, size,
+    race result) as each is decided; see race and grid_size.
+    """
+    for puzzle in puzzles:
+        yield puzzle, grid_size(puzzle), race(puzzle, configs, time_limit)
+
+
+def win_counts(races):
+    """
+    Counts the wins of every configuration per grid size from (size, race
+    result) pairs; undecided races count under None.
+    """
+    wins = {}
+    for size, result in races:
+        per_size = wins.setdefault(size, {})
+        per_size[result["winner"]] = per_size.get(result["winner"], 0) + 1
+    return wins
+
+
+def format_wins(wins):
+    lines = []
+    for size, per_size in wins.items():
+        total = sum(per_size.values())
+        lines.append(f"{size} ({total} puzzles)")
+        for name, count in sorted(per_size.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name or 'undecided':16} {count:5}  {count / total:6.1%}")
+    return "\n".join(lines)
+
+
+def load_puzzles(sources):
+    """
+    Expands the sources into puzzles: CNF globs into their files, text files
+    into their grids, numbered for display.
+    """
+    puzzles = []
+    for source in sources:
+        if source.endswith(".txt"):
+            puzzles.extend(read_puzzles(source))
+        else:
+            puzzles.extend(sorted(glob.glob(source)))
+    return puzzles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race solver configurations on each puzzle, first answer wins.")
+    parser.add_argument("sources", nargs="+", help="CNF files or globs, or line-per-puzzle text files")
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS, choices=list(CONFIGS))
+    parser.add_argument("--time-limit", type=float, help="seconds per puzzle before it counts as unknown")
+    parser.add_argument("--output", help="write one CSV row per puzzle to this file")
+    args = parser.parse_args()
+
+    puzzles = load_puzzles(args.sources)
+    races = []
+    output = open(args.output, "w", newline="") if args.output else None
+    try:
+        writer = csv.writer(output) if output else None
+        if writer:
+            writer.writerow(FIELDS)
+        for index, (puzzle, size, result) in enumerate(run_portfolio(puzzles, args.configs, args.time_limit)):
+            name = puzzle if isinstance(puzzle, str) else index + 1
+            races.append((size, result))
+            print(f"{name}: {result['status']} by {result['winner']} in {result['time_taken']:.3f} s",
+                  file=sys.stderr)
+            if writer:
+                writer.writerow([name, size, result["status"], result["winner"] or "",
+                                 f"{result['time_taken']:.6f}", result["stats"].get("evaluations", ""),
+                                 result["stats"].get("backtracks", "")])
+    finally:
+        if output:
+            output.close()
+    print(format_wins(win_counts(races)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+from array import array
+from clause_store import ClauseStore
+
+
+class WatchedPropagator:
+    """
+    Unit propagation based on two watched literals.
+
+    Every clause with two or more literals watches its first two positions.
+    A clause is only visited when one of its watched literals becomes false,
+    so an assignment touches the clauses in the watch list of the falsified
+    literal instead of the whole formula. The clauses themselves are never
+    rewritten: backtracking only has to unassign variables, watches stay valid.
+
+    Assignments are kept on a trail split into decision levels, so going back
+    to an earlier level pops the literals assigned since then and costs time
+    proportional to the number of changes. Every assigned variable records
+    its decision level and the index of the clause that implied it (None for
+    decisions and units), which is the implication graph used by CDCL.
+
+    The formula is a ClauseStore and literals are its dense codes: `values`
+    holds the truth of each literal code, `levels` and `reasons` are indexed
+    by dense variable. Watching a clause swaps literals inside the store's
+    flat buffer, no per-clause lists are built.
+
+    Learned clauses form a separate tier at the end of the store, from index
+    `num_original` on. Each has a literal block distance (the number of
+    decision levels among its literals when it was learned, low for clauses
+    that tie few decisions together) and an activity bumped whenever it takes
+    part in a conflict, which reduce_learned uses to pick the clauses to drop.
+    """
+
+    GLUE = 2  # Learned clauses with an LBD up to this are never deleted
+
+    def __init__(self, clauses):
+        if not isinstance(clauses, ClauseStore):
+            clauses = ClauseStore.from_clauses(clauses)
+        self.store = clauses
+        self.num_vars = clauses.num_vars
+        self.variables = range(self.num_vars)
+        self.values = [None] * (2 * self.num_vars)
+        self.levels = [0] * self.num_vars
+        self.reasons = [None] * self.num_vars
+        self.watches = [[] for _ in range(2 * self.num_vars)]
+        self.trail = []
+        self.trail_lim = []  # Trail size at the start of each decision level
+        self.queue_head = 0
+        self.conflict = None
+        self.inconsistent = False
+
+        self.num_original = len(clauses)
+        self.tautologies = set()  # Clauses with a literal and its negation, never watched
+        self.learned_lbd = []  # Per learned clause, by index - num_original
+        self.learned_activity = []
+        self.clause_increment = 1.0
+        self.clause_decay = 0.999
+        self.num_deleted = 0
+        self.peak_learned = 0
+        self.num_propagations = 0  # Falsified literals whose watchers were visited
+        self.clause_visits = 0  # Watched clauses looked at by propagate
+
+        for index in range(len(clauses)):
+            self.__attach(index)
+
+    def __attach(self, index):
+        """
+        Sets up the watches of a stored clause, dropping repeated literals first.
+        Unit clauses are enqueued directly, an empty clause makes the formula
+        inconsistent and tautologies are left out: any assignment satisfies them.
+        """
+        store = self.store
+        literals = store.literals
+        start = store.offsets[index]
+        length = store.lengths[index]
+        if length > 1:
+            unique = dict.fromkeys(literals[start:start + length])
+            if any(literal ^ 1 in unique for literal in unique):
+                self.tautologies.add(index)
+                return
+            if len(unique) < length:
+                literals[start:start + len(unique)] = array('i', unique)
+                length = store.lengths[index] = len(unique)
+        if length == 0:
+            self.inconsistent = True
+        elif length == 1:
+            if not self.assign(literals[start]):
+                self.inconsistent = True
+        else:
+            self.watches[literals[start]].append(index)
+            self.watches[literals[start + 1]].append(index)
+
+    def value(self, literal):
+        """
+        Returns True/False for an assigned literal code and None otherwise.
+        """
+        return self.values[literal]
+
+    def assign(self, literal, reason=None):
+        """
+        Makes a literal true at the current decision level and queues it for propagation.
+        Returns False if the literal is already false.
+        """
+        value = self.values[literal]
+        if value is not None:
+            return value
+        self.values[literal] = True
+        self.values[literal ^ 1] = False
+        var = literal >> 1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+        return True
+
+    def learn(self, clause, lbd=None):
+        """
+        Adds a learned clause of literal codes and asserts its first literal.
+        The solver must already have backjumped so that the first literal is
+        unassigned and the second one is false at the highest remaining level.
+        Unit clauses are only asserted, at level 0 they hold for good.
+        """
+        if len(clause) == 1:
+            self.assign(clause[0])
+            return
+        index = self.store.add_codes(clause)
+        self.learned_lbd.append(len(clause) if lbd is None else lbd)
+        self.learned_activity.append(self.clause_increment)
+        self.peak_learned = max(self.peak_learned, len(self.learned_lbd))
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        self.assign(clause[0], index)
+
+    def num_learned(self):
+        """
+        Returns the number of learned clauses currently stored.
+        """
+        return len(self.learned_lbd)
+
+    def learned_memory(self):
+        """
+        Returns the bytes taken by the learned tier: its literals in the
+        store's buffer, its offset and length entries and its two watches.
+        """
+        store = self.store
+        if len(store) == self.num_original:
+            return 0
+        literals = len(store.literals) - store.offsets[self.num_original]
+        return store.literals.itemsize * (literals + 2 * self.num_learned()) + 8 * 2 * self.num_learned()
+
+    def bump_clause(self, index):
+        """
+        Rewards a learned clause that took part in a conflict. Original clauses are ignored.
+        """
+        position = index - self.num_original
+        if position < 0:
+            return
+        activity = self.learned_activity
+        activity[position] += self.clause_increment
+        if activity[position] > 1e20:
+            for i in range(len(activity)):
+                activity[i] *= 1e-20
+            self.clause_increment *= 1e-20
+
+    def decay_clause_activity(self):
+        """
+        Ages the activity of all learned clauses after a conflict.
+        """
+        self.clause_increment /= self.clause_decay
+
+    def reduce_learned(self):
+        """
+        Deletes the worse half of the learned clauses, ranked by LBD and then
+        by activity. Glue clauses (LBD up to GLUE) and clauses that are the
+        reason of a current assignment are kept. The tier is compacted in
+        the store, so deleted clauses give their memory back, and watches
+        and reasons are renumbered. Returns the number of deleted clauses.
+        """
+        store = self.store
+        first = self.num_original
+        lbd = self.learned_lbd
+        activity = self.learned_activity
+        reasons = self.reasons
+        locked = {reasons[literal >> 1] for literal in self.trail}
+        candidates = [position for position in range(len(lbd))
+                      if lbd[position] > self.GLUE and first + position not in locked]
+        candidates.sort(key=lambda position: (-lbd[position], activity[position]))
+        deleted = set(candidates[:len(candidates) // 2])
+        if not deleted:
+            return 0
+
+        kept = [position for position in range(len(lbd)) if position not in deleted]
+        clauses = [store.clause(first + position) for position in kept]
+        store.truncate(first)
+        renumbered = {}
+        for position, clause in zip(kept, clauses):
+            renumbered[first + position] = store.add_codes(clause)
+        self.learned_lbd = [lbd[position] for position in kept]
+        self.learned_activity = [activity[position] for position in kept]
+
+        for literal, watchers in enumerate(self.watches):
+            if watchers:
+                self.watches[literal] = [index if index < first else renumbered[index]
+                                         for index in watchers if index < first or index in renumbered]
+        for var, reason in enumerate(reasons):
+            if reason is not None and reason >= first:
+                reasons[var] = renumbered.get(reason)
+        self.num_deleted += len(deleted)
+        return len(deleted)
+
+    def propagate(self):
+        """
+        Propagates all queued assignments.
+        Returns False and records the falsified clause in `self.conflict` on a conflict.
+        """
+        if self.inconsistent:
+            return False
+        values = self.values
+        levels = self.levels
+        reasons = self.reasons
+        watches = self.watches
+        literals = self.store.literals
+        offsets = self.store.offsets
+        lengths = self.store.lengths
+        trail = self.trail
+        level = len(self.trail_lim)
+        first = self.queue_head
+        visits = 0
+
+        while self.queue_head < len(trail):
+            false_literal = trail[self.queue_head] ^ 1
+            self.queue_head += 1
+            watchers = watches[false_literal]
+            visits += len(watchers)
+            kept = []
+
+            for position, index in enumerate(watchers):
+                start = offsets[index]
+                # Keep the falsified watch in the second position
+                other = literals[start]
+                if other == false_literal:
+                    other = literals[start + 1]
+                    literals[start] = other
+                    literals[start + 1] = false_literal
+                other_value = values[other]
+                if other_value:
+                    kept.append(index)  # Clause is satisfied
+                    continue
+
+                # Look for a replacement watch that is not false
+                for k in range(start + 2, start + lengths[index]):
+                    literal = literals[k]
+                    if values[literal] is not False:
+                        literals[start + 1] = literal
+                        literals[k] = false_literal
+                        watches[literal].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if other_value is None:
+                        # Clause became unit
+                        values[other] = True
+                        values[other ^ 1] = False
+                        var = other >> 1
+                        levels[var] = level
+                        reasons[var] = index
+                        trail.append(other)
+                    else:
+                        # Conflict: every literal of the clause is false
+                        kept.extend(watchers[position + 1:])
+                        watches[false_literal] = kept
+                        self.conflict = index
+                        self.num_propagations += self.queue_head - first
+                        self.clause_visits += visits - (len(watchers) - position - 1)
+                        self.queue_head = len(trail)
+                        return False
+
+            watches[false_literal] = kept
+        self.num_propagations += self.queue_head - first
+        self.clause_visits += visits
+        return True
+
+    def decision_level(self):
+        """
+        Returns the current decision level, 0 before any decision.
+        """
+        return len(self.trail_lim)
+
+    def new_decision_level(self):
+        """
+        Opens a new decision level on the trail.
+        """
+        self.trail_lim.append(len(self.trail))
+
+    def backtrack(self, level):
+        """
+        Unassigns every literal assigned above the given decision level.
+        Returns the unassigned literals.
+        """
+        if level >= len(self.trail_lim):
+            return []
+        values = self.values
+        trail = self.trail
+        trail_size = self.trail_lim[level]
+        unassigned = trail[trail_size:]
+        del trail[trail_size:]
+        for literal in unassigned:
+            values[literal] = None
+            values[literal ^ 1] = None
+        del self.trail_lim[level:]
+        self.queue_head = min(self.queue_head, trail_size)
+        self.conflict = None
+        return unassigned
+
+    def all_assigned(self):
+        """
+        Checks if every variable of the formula has a value.
+        """
+        return len(self.trail) == self.num_vars
+
+    def unassigned_variables(self):
+        """
+        Returns the variables that have no value yet.
+        """
+        values = self.values
+        return [var for var in self.variables if values[2 * var] is None]
+
+    def model(self):
+        """
+        Returns the current assignment as a dictionary of DIMACS variable to value.
+        """
+        values = self.values
+        var_ids = self.store.var_ids
+        return {var_ids[var]: values[2 * var] for var in self.variables if values[2 * var] is not None}
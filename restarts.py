@@ -0,0 +1,132 @@
+from collections import deque
+
+
+def luby(index):
+    """
+    Returns the index-th term (from 0) of the Luby sequence 1 1 2 1 1 2 4 ...
+    """
+    size, power = 1, 0
+    while size < index + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != index:
+        size = (size - 1) >> 1
+        power -= 1
+        index %= size
+    return 1 << power
+
+
+class NoRestarts:
+    """
+    Never restarts: the search keeps its decisions until it backjumps.
+    """
+
+    name = "none"
+
+    def on_conflict(self, lbd):
+        """
+        Records a conflict whose learned clause has the given literal block
+        distance. Returns True if the solver should restart now.
+        """
+        return False
+
+    def on_restart(self):
+        """
+        Starts counting towards the next restart.
+        """
+
+
+class LubyRestarts(NoRestarts):
+    """
+    Restarts after unit * luby(i) conflicts for the i-th restart, the
+    schedule with the best worst-case bound for runs of unknown length.
+    """
+
+    name = "luby"
+
+    def __init__(self, unit=100):
+        self.unit = unit
+        self.restarts = 0
+        self.conflicts = 0
+        self.limit = unit * luby(0)
+
+    def on_conflict(self, lbd):
+        self.conflicts += 1
+        return self.conflicts >= self.limit
+
+    def on_restart(self):
+        self.restarts += 1
+        self.conflicts = 0
+        self.limit = self.unit * luby(self.restarts)
+
+
+class GeometricRestarts(NoRestarts):
+    """
+    Restarts after `first` conflicts, each later interval `factor` times the
+    previous one.
+    """
+
+    name = "geometric"
+
+    def __init__(self, first=100, factor=1.5):
+        self.factor = factor
+        self.conflicts = 0
+        self.limit = first
+
+    def on_conflict(self, lbd):
+        self.conflicts += 1
+        return self.conflicts >= self.limit
+
+    def on_restart(self):
+        self.conflicts = 0
+        self.limit *= self.factor
+
+
+class GlucoseRestarts(NoRestarts):
+    """
+    Glucose's dynamic restarts: the solver restarts when the learned clauses
+    of the last `window` conflicts are clearly worse (higher LBD) than the
+    average over the whole run, i.e. when the search seems to have wandered
+    into a part of the space where it only learns weak clauses.
+    """
+
+    name = "glucose"
+
+    def __init__(self, window=50, margin=0.8):
+        self.margin = margin
+        self.recent = deque(maxlen=window)
+        self.recent_sum = 0
+        self.total_sum = 0
+        self.total = 0
+
+    def on_conflict(self, lbd):
+        self.total += 1
+        self.total_sum += lbd
+        if len(self.recent) == self.recent.maxlen:
+            self.recent_sum -= self.recent[0]
+        self.recent.append(lbd)
+        self.recent_sum += lbd
+        if len(self.recent) < self.recent.maxlen:
+            return False
+        return self.recent_sum / len(self.recent) * self.margin > self.total_sum / self.total
+
+    def on_restart(self):
+        self.recent.clear()
+        self.recent_sum = 0
+
+
+RESTARTS = {
+    NoRestarts.name: NoRestarts,
+    LubyRestarts.name: LubyRestarts,
+    GeometricRestarts.name: GeometricRestarts,
+    GlucoseRestarts.name: GlucoseRestarts,
+}
+
+
+def make_restart_policy(restarts):
+    """
+    Builds the restart policy with the given name.
+    """
+    if restarts not in RESTARTS:
+        raise ValueError(f"Unknown restart policy '{restarts}', expected one of {sorted(RESTARTS)}")
+    return RESTARTS[restarts]()
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import numpy as np
+import sudoku_codec
+from clause_store import ClauseStore
+from dimacs_parser import load_dimacs
+
+CACHE_DIR = "cnf_cache"  # Compiled rule sets, one .npz per rules file content
+
+# Rule sets already loaded by this process, by content hash
+_loaded = {}
+# Content hashes already computed by this process, by (path, mtime, size)
+_digests = {}
+
+
+def file_hash(file_path):
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def rules_hash(rules_file):
+    """
+    Returns the content hash of a rules file, hashing it only the first time
+    and again whenever its modification time or size changes.
+    """
+    path = os.path.abspath(rules_file)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _digests.get(key)
+    if digest is None:
+        digest = _digests[key] = file_hash(path)
+    return digest
+
+
+def cache_path(rules_file, digest, cache_dir=CACHE_DIR):
+    """
+    Returns where the compiled form of a rules file with the given hash is kept.
+    """
+    name = os.path.splitext(os.path.basename(rules_file))[0]
+    return os.path.join(cache_dir, f"{name}-{digest[:16]}.npz")
+
+
+def save_store(path, store, num_vars):
+    """
+    Writes a ClauseStore to an .npz file. The file is written under a temporary
+    name first, so processes sharing the cache never read a partial file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f,
+                 var_ids=np.array(store.var_ids, dtype=np.int64),
+                 literals=np.frombuffer(store.literals, dtype=np.intc),
+                 offsets=np.frombuffer(store.offsets, dtype=np.intc),
+                 lengths=np.frombuffer(store.lengths, dtype=np.intc),
+                 num_vars=np.array(num_vars))
+    os.replace(tmp_path, path)
+
+
+def load_store(path):
+    """
+    Reads a ClauseStore written by save_store.
+    Returns the store and the number of variables declared by the rules file.
+    """
+    with np.load(path) as data:
+        store = ClauseStore.from_codes(data["var_ids"].tolist(),
+                                       data["literals"].astype(np.intc).tobytes(),
+                                       data["offsets"].astype(np.intc).tobytes(),
+                                       data["lengths"].astype(np.intc).tobytes())
+        return store, int(data["num_vars"])
+
+
+def load_base_rules(rules_file, cache_dir=CACHE_DIR):
+    """
+    Returns the rule set of a rules file as a ClauseStore and the number of
+    variables declared in its header.
+
+    The file is parsed once and compiled to `cache_dir`, keyed by the hash of
+    its contents, so later runs load the arrays instead of parsing the text
+    and an edited rules file is never served from a stale cache. Within a
+    process the store is also kept in memory, and the file is only hashed
+    again once its modification time or size changes. The returned store is
+    shared: use puzzle_formula() to get a copy a solver may modify.
+    """
+    digest = rules_hash(rules_file)
+    if digest not in _loaded:
+        path = cache_path(rules_file, digest, cache_dir)
+        if os.path.exists(path):
+            _loaded[digest] = load_store(path)
+        else:
+            store, num_vars = load_dimacs(rules_file)
+            save_store(path, store, num_vars)
+            _loaded[digest] = store, num_vars
+    return _loaded[digest]
+
+
+def clue_literals(grid):
+    """
+    Returns the unit literals of the filled cells of a grid (0 for empty) in
+    the numbering of the sudoku-rules-*.txt files, see sudoku_codec.legacy_var.
+    """
+    return sudoku_codec.clue_literals(grid, sudoku_codec.legacy_var)
+
+
+def puzzle_formula(base, clues):
+    """
+    Returns a copy of a base rule store with one unit clause per clue literal.
+    """
+    store = base.copy()
+    for literal in clues:
+        store.add_clause([literal])
+    return store
+
+
+def load_puzzle(rules_file, clues, cache_dir=CACHE_DIR):
+    """
+    Builds the formula of one puzzle from the cached rules of its grid size and
+    its clue literals (see clue_literals). Returns a ClauseStore any solver accepts.
+    """
+    base, _ = load_base_rules(rules_file, cache_dir)
+    return puzzle_formula(base, clues)
@@ -1,40 +1,28 @@
 import os
-import time
 import numpy as np
 import csv
 from collections import defaultdict
+from statistics import median
 from CDCL import parse_cnf, CDCL
 from DPLL import DPLL
 from JW import JW
 import json
+from benchmark import time_solve
+from sudoku_codec import format_board, legacy_var, model_size, model_to_grid
 
 
-def print_solution(assignment):
+def print_solution(assignment, size=None):
     """
     Print the Sudoku solution in a readable grid format.
+    The CNF files use the variable numbering of the sudoku-rules-*.txt files;
+    without a size it is taken from the model's variable range.
     """
-    grid = [[0 for _ in range(9)] for _ in range(9)]
-
-    for var, value in assignment.items():
-        if value and 100 <= var <= 999:
-            row = (var // 100) - 1
-            col = ((var // 10) % 10) - 1
-            digit = var % 10
-            grid[row][col] = digit
-
+    if size is None:
+        size = model_size(assignment, legacy_var)
+    if not size:
+        return
     print("\nSudoku Solution:")
-    print("  " + "-" * 25)
-    for i, row in enumerate(grid):
-        if i % 3 == 0 and i != 0:
-            print("  " + "-" * 25)
-        row_str = "  |"
-        for j, val in enumerate(row):
-            if j % 3 == 0 and j != 0:
-                row_str += "|"
-            row_str += f" {val}"
-        row_str += " |"
-        print(row_str)
-    print("  " + "-" * 25)
+    print(format_board(model_to_grid(assignment, size, legacy_var)))
 
 def save_results_to_file(results, file_path):
     with open(file_path, "w") as f:
@@ -58,16 +46,45 @@ def save_results_to_json(results, file_path):
     print(f"Results saved to {file_path}")
 
 
+RESULT_FIELDS = ["solver", "heuristic", "grid_size", "sudoku_number", "evaluations", "backtracks", "restarts", "time_taken", "status"]
+
+
+def csv_header(csv_file, fieldnames):
+    """
+    Returns the columns to append to a results CSV under.
+    A file written with fewer columns is rewritten first with the missing ones
+    added (empty in its old rows), so new rows never land under the wrong header.
+    """
+    if not os.path.exists(csv_file) or os.path.getsize(csv_file) == 0:
+        return fieldnames
+    with open(csv_file, mode='r', newline='') as file:
+        reader = csv.DictReader(file)
+        header = reader.fieldnames or []
+        if set(fieldnames) <= set(header):
+            return header
+        rows = list(reader)
+
+    header = fieldnames + [name for name in header if name not in fieldnames]
+    tmp_file = f"{csv_file}.tmp"
+    with open(tmp_file, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=header, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_file, csv_file)
+    print(f"Migrated {csv_file} to columns: {', '.join(header)}")
+    return header
+
+
 def save_results_to_csv(results, csv_file, append=False):
     """
     Saves results into a CSV file iteratively.
-    The file is opened in append mode if `append=True`.
+    Rows are appended; the header is written for a new file and migrated
+    for a file written with older columns, see csv_header.
     """
-    fieldnames = ["solver", "grid_size", "sudoku_number", "evaluations", "backtracks", "time_taken", "status"]
-    
-    # Open the CSV file for appending or writing
+    header = csv_header(csv_file, RESULT_FIELDS)
+
     with open(csv_file, mode='a', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer = csv.DictWriter(file, fieldnames=header, restval="")
 
         # If the file is empty (i.e., it doesn't exist or it's the first run), write the header
         if file.tell() == 0:
@@ -75,28 +92,23 @@ def save_results_to_csv(results, csv_file, append=False):
 
         # Write the results for each file
         for file_path, data in results.items():
-            print(data)
             for i in range(len(data["solver"])):
-                row = {
-                    "solver": data["solver"][i],
-                    "grid_size": data["grid_size"][i],
-                    "sudoku_number": data["sudoku_number"][i],
-                    "evaluations": data["evaluations"][i],
-                    "backtracks": data["backtracks"][i],
-                    "time_taken": data["time_taken"][i],
-                    "status": data["status"][i]
-                }
-                writer.writerow(row)
+                writer.writerow({field: data[field][i] for field in RESULT_FIELDS})
 
     print(f"Results saved to CSV: {csv_file}")
 
 
 
-def run_solver_experiment(solver_class, cnf_files, solver_name, num_runs=1, save_path="all_results.json", csv_file="experiment_results.csv"):
+def run_solver_experiment(solver_class, cnf_files, solver_name, num_runs=1, save_path="all_results.json", csv_file="experiment_results.csv", heuristic=None, verbose=True):
+    """
+    Solves every CNF file with one solver and saves the statistics.
+    With verbose=False nothing is printed per file.
+    """
     results = defaultdict(lambda: defaultdict(list))
 
     for file_path in cnf_files:
-        print(f"\n== Running solver {solver_name} on {file_path}...")
+        if verbose:
+            print(f"\n== Running solver {solver_name} on {file_path}...")
 
         filename = os.path.basename(file_path)
         parts = filename.split(".")
@@ -109,35 +121,31 @@ def run_solver_experiment(solver_class, cnf_files, solver_name, num_runs=1, save
             print("*not 9x9 hard")
 
         try:
-            # print("TRYING")
             # Parse CNF file
-            clauses, num_vars = parse_cnf(file_path)
-
-            # Initialize the solver
-            solver = solver_class(clauses)
-
-            # Start timer
-            start_time = time.time()
-
-            # Solve the problem
-            result, assignments, evals, backtracks = solver.solve()
-
-            time_taken = time.time() - start_time
-
-            print_solution(assignments)
-            # print("HELLO")
-
-            # Time taken
-            # time_taken = time.time() - start_time
+            clauses, num_vars = parse_cnf(file_path, compact=True)
+
+            # Time num_runs quiet solves, keep the median (see benchmark.py for full statistics)
+            times_ns = []
+            for _ in range(num_runs):
+                solver, result, elapsed_ns = time_solve(solver_class, clauses, heuristic)
+                times_ns.append(elapsed_ns)
+            time_taken = median(times_ns) / 1e9
+            assignments = solver.propagator.model()
+            evals, backtracks = solver.num_evaluations, solver.num_backtracking
+
+            if verbose:
+                print(f"{'SATISFIABLE' if result else 'UNSATISFIABLE'} in {time_taken:.4f} seconds "
+                      f"(median of {num_runs}), {evals} evaluations, {backtracks} backtracks")
+                print_solution(assignments)
 
             # Store statistics
-            # print(solver_name, grid_size, sudoku_number, evals, backtracks, time_taken)
-
             results[file_path]["solver"].append(solver_name)
+            results[file_path]["heuristic"].append(solver.heuristic)
             results[file_path]["grid_size"].append(grid_size)
             results[file_path]["sudoku_number"].append(sudoku_number)
             results[file_path]["evaluations"].append(evals)
             results[file_path]["backtracks"].append(backtracks)
+            results[file_path]["restarts"].append(getattr(solver, "num_restarts", 0))
             results[file_path]["time_taken"].append(time_taken)
             results[file_path]["status"].append("SATISFIABLE" if result else "UNSATISFIABLE")
 
@@ -153,16 +161,16 @@ def run_solver_experiment(solver_class, cnf_files, solver_name, num_runs=1, save
 
 def run_experiment():
     solvers = [
-        (CDCL, "CDCL"),
-        (DPLL, "DPLL"),
-        (JW, "JW")
+        (CDCL, "CDCL", "vsids"),
+        (DPLL, "DPLL", "order"),
+        (JW, "JW", "jw")
     ]
 
     all_results = {}
 
-    for solver_class, solver_name in solvers:
-        print(f"\n======= Running experiments for solver: {solver_name}\n")
-        results = run_solver_experiment(solver_class, cnf_files, solver_name)
+    for solver_class, solver_name, heuristic in solvers:
+        print(f"\n======= Running experiments for solver: {solver_name} ({heuristic})\n")
+        results = run_solver_experiment(solver_class, cnf_files, solver_name, heuristic=heuristic)
         all_results[solver_name] = results
         print(f"Completed experiments for solver: {solver_name}\n")
 
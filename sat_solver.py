@@ -22,6 +22,33 @@ class SATSolverBase:
     def unassigned_vars(self):
         return {abs(lit) for clause in self.clauses for lit in clause} - self.assignment.keys()
 
+    def search(self, choose_var):
+        """
+        Depth-first search over the variables picked by choose_var, True
+        before False, as a loop over an explicit stack of decided variables
+        instead of one recursive call per decision.
+        """
+        decisions = []
+        while True:
+            if self.all_satisfied():
+                return True
+            if not self.any_unsatisfied():
+                var = choose_var()
+                self.assignment[var] = True
+                decisions.append(var)
+                continue
+
+            # Undo decisions that failed both ways, flip the latest one still True
+            while decisions:
+                var = decisions[-1]
+                if self.assignment[var]:
+                    self.assignment[var] = False
+                    break
+                del self.assignment[var]
+                decisions.pop()
+            else:
+                return False
+
     def get_solution(self):
         return [f"{var if self.assignment.get(var, False) else -var} 0" for var in range(1, self.num_vars + 1)]
 
@@ -31,19 +58,8 @@ class DPLLSolver(SATSolverBase):
         return self.dpll()
 
     def dpll(self):
-        if self.all_satisfied():
-            return True
-        if self.any_unsatisfied():
-            return False
-
-        var = next(iter(self.unassigned_vars()))  # Choose first unassigned variable
-        for value in [True, False]:
-            self.assignment[var] = value
-            if self.dpll():
-                return True
-            del self.assignment[var]
-
-        return False
+        # Choose first unassigned variable
+        return self.search(lambda: next(iter(self.unassigned_vars())))
 
 
 class JWSolver(SATSolverBase):
@@ -60,19 +76,8 @@ class JWSolver(SATSolverBase):
         return weights.most_common(1)[0][0] if weights else None
 
     def dpll(self):
-        if self.all_satisfied():
-            return True
-        if self.any_unsatisfied():
-            return False
-
-        var = self.jw_heuristic()  # Choose variable using JW heuristic
-        for value in [True, False]:
-            self.assignment[var] = value
-            if self.dpll():
-                return True
-            del self.assignment[var]
-
-        return False
+        # Choose variable using JW heuristic
+        return self.search(self.jw_heuristic)
 
 
 class CDCLSolver(SATSolverBase):
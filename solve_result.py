@@ -0,0 +1,156 @@
+import time
+
+SATISFIABLE = "SATISFIABLE"
+UNSATISFIABLE = "UNSATISFIABLE"
+UNKNOWN = "UNKNOWN"  # The search stopped before deciding
+ERROR = "ERROR"
+
+
+class SolveResult:
+    """
+    Outcome of one solve: the status, the model (a dict of DIMACS variable
+    to value, empty unless satisfiable), the solver's counters and the
+    timings in seconds.
+    """
+
+    def __init__(self, status, model, stats, timings):
+        self.status = status
+        self.model = model
+        self.stats = stats
+        self.timings = timings
+
+    @property
+    def satisfiable(self):
+        return self.status == SATISFIABLE
+
+    def as_tuple(self):
+        """
+        Returns the (result, assignments, evaluations, backtracks) that solve() returns.
+        """
+        return self.satisfiable, self.model, self.stats["evaluations"], self.stats["backtracks"]
+
+    def to_dict(self):
+        return {"status": self.status, "model": self.model, "stats": self.stats, "timings": self.timings}
+
+    def __repr__(self):
+        return f"SolveResult({self.status}, {len(self.model)} assignments, {self.stats}, {self.timings})"
+
+
+def solver_stats(solver):
+    """
+    Returns the counters a solver keeps; those of CDCL and of the propagator
+    only when the solver has them.
+    """
+    stats = {"evaluations": solver.num_evaluations, "backtracks": solver.num_backtracking,
+             "decisions": solver.num_decisions, "conflicts": solver.num_conflicts}
+    if hasattr(solver, "num_restarts"):
+        stats["restarts"] = solver.num_restarts
+        stats["learned"] = solver.num_learned
+    propagator = getattr(solver, "propagator", None)
+    if propagator is not None:
+        stats["propagations"] = propagator.num_propagations
+        stats["clause_visits"] = propagator.clause_visits
+        if hasattr(solver, "num_learned"):
+            stats["learned_kept"] = propagator.num_learned()
+            stats["learned_deleted"] = propagator.num_deleted
+            stats["learned_peak"] = propagator.peak_learned
+            stats["learned_bytes"] = propagator.learned_memory()
+    return stats
+
+
+def _report_progress(propagator, solver, progress, every, start):
+    """
+    Wraps the propagate method of one propagator instance so that every
+    `every` calls (one per evaluation) progress() gets the counters so far.
+    """
+    propagate = propagator.propagate
+    calls = 0
+
+    def reporting():
+        nonlocal calls
+        calls += 1
+        if calls % every == 0:
+            stats = solver_stats(solver)
+            stats["elapsed"] = time.perf_counter() - start
+            progress(stats)
+        return propagate()
+    propagator.propagate = reporting
+
+
+def run_solver(solver, logger=None, progress=None, progress_every=1000):
+    """
+    Runs a solver's search without any console output and returns a
+    SolveResult. A logger (logging.Logger) gets the start and the outcome
+    at INFO level; progress, a callable, gets the counters and the elapsed
+    time every `progress_every` evaluations. Neither costs anything when
+    not given. A search that runs out of budget (see budget.Budget) or is
+    interrupted (KeyboardInterrupt) gives UNKNOWN, with the statistics so
+    far and what stopped it in stats["stopped_by"].
+    """
+    name = type(solver).__name__
+    if logger is not None:
+        logger.info("Starting %s solver (%s)", name, solver.heuristic)
+    propagator = getattr(solver, "propagator", None)
+    wrapped = progress is not None and propagator is not None
+    previous = vars(propagator).get("propagate") if wrapped else None  # A profile's timer, if any
+    start = time.perf_counter()
+    if wrapped:
+        _report_progress(propagator, solver, progress, progress_every, start)
+    try:
+        try:
+            sat = solver.__solve__()
+            status = UNKNOWN if sat is None else SATISFIABLE if sat else UNSATISFIABLE
+        except KeyboardInterrupt:
+            solver.stopped_by = "interrupted"
+            status = UNKNOWN
+        model = {}
+        if status == SATISFIABLE:
+            model = propagator.model() if propagator is not None else solver.model()
+            if propagator is not None and propagator.unassigned_variables():
+                status = ERROR  # Should not happen: satisfied means every variable is assigned
+        elapsed = time.perf_counter() - start
+    finally:
+        if wrapped:
+            if previous is None:
+                del propagator.propagate
+            else:
+                propagator.propagate = previous
+
+    stats = solver_stats(solver)
+    if status == UNKNOWN:
+        stats["stopped_by"] = solver.stopped_by
+    if status == ERROR:
+        stats["error"] = "unassigned variables remain"
+        model = {}
+    result = SolveResult(status, model, stats, {"solve": elapsed})
+    if logger is not None:
+        logger.info("%s finished: %s in %.3f s, %d evaluations, %d backtracks",
+                    name, status, elapsed, stats["evaluations"], stats["backtracks"])
+    return result
+
+
+def print_outcome(result):
+    """
+    Prints a SolveResult the way the solvers' solve() methods report.
+    """
+    stats = result.stats
+    if result.status == UNKNOWN:
+        if stats["stopped_by"] == "interrupted":
+            print("\nSolver interrupted by user")
+        else:
+            print(f"\tSolver stopped: {stats['stopped_by']} budget exhausted")
+        print(f"Status: {result.status}")
+        print(f"Time elapsed: {result.timings['solve']:.2f} seconds")
+    else:
+        print("\tSolver finished!")
+        print(f"Status: {result.status}")
+        print(f"Time taken: {result.timings['solve']:.2f} seconds")
+    print(f"Evaluations: {stats['evaluations']}")
+    print(f"Backtracks: {stats['backtracks']}")
+    if "learned" in stats:
+        print(f"Learned clauses: {stats['learned']} ({stats['learned_kept']} kept, "
+              f"{stats['learned_deleted']} deleted, peak {stats['learned_peak']}, "
+              f"{stats['learned_bytes'] / 1024:.1f} KiB)")
+        print(f"Restarts: {stats['restarts']}")
+    if result.status == ERROR:
+        print(f"Error: {stats['error']}")
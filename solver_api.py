@@ -0,0 +1,70 @@
+import time
+from CDCL import CDCL
+from clause_store import ClauseStore
+from DPLL import DPLL, parse_cnf
+from JW import JW
+from solve_result import run_solver
+from sudoku_bitmask import BitmaskSudoku
+from sudoku_encoding import encode_sudoku
+
+SOLVERS = {"CDCL": CDCL, "DPLL": DPLL, "JW": JW, "BITMASK": BitmaskSudoku}
+
+
+def is_grid(formula):
+    """
+    Checks if a formula is a Sudoku grid (a list of rows).
+    """
+    return isinstance(formula, list) and bool(formula) and isinstance(formula[0], list)
+
+
+def load_store(formula):
+    """
+    Returns a formula as a ClauseStore: a DIMACS file path is parsed, a
+    Sudoku grid encoded with sudoku_encoding and a dict of clauses
+    converted. A ClauseStore is returned as it is, the solvers work on a
+    copy of it.
+    """
+    if isinstance(formula, ClauseStore):
+        return formula
+    if isinstance(formula, str):
+        store, _ = parse_cnf(formula, compact=True)
+        return store
+    if is_grid(formula):
+        store, _ = encode_sudoku(formula)
+        return store
+    return ClauseStore.from_clauses(formula)
+
+
+def make_solver(formula, solver="CDCL", **options):
+    """
+    Builds a solver by name on a formula: a DIMACS file path, a dict of
+    clauses, a ClauseStore, or a Sudoku grid (list of rows, 0 for empty
+    cells), which is encoded with sudoku_encoding unless the solver takes
+    grids itself. Options go to the solver's constructor.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', expected one of {sorted(SOLVERS)}")
+    solver_class = SOLVERS[solver]
+    if not getattr(solver_class, "grid_input", False):
+        formula = load_store(formula)
+    elif not is_grid(formula):
+        raise ValueError(f"Solver '{solver}' only takes Sudoku grids")
+    return solver_class(formula, **options)
+
+
+def solve_formula(formula, solver="CDCL", logger=None, progress=None, progress_every=1000, **options):
+    """
+    Solves a formula with no console output and returns a
+    solve_result.SolveResult: status, model, stats and timings ("build" for
+    parsing or encoding plus the solver's setup, "solve" for the search).
+
+    The formula and options are as for make_solver. Pass a logging.Logger
+    and/or a progress callable to follow the solve, see
+    solve_result.run_solver; without them nothing is reported.
+    """
+    start = time.perf_counter()
+    instance = make_solver(formula, solver, **options)
+    build_time = time.perf_counter() - start
+    result = run_solver(instance, logger=logger, progress=progress, progress_every=progress_every)
+    result.timings["build"] = build_time
+    return result
@@ -0,0 +1,223 @@
+from budget import Budget
+from solve_result import print_outcome, run_solver
+from sudoku_codec import dense_var
+from sudoku_preprocess import sudoku_units
+
+
+class BitmaskSudoku:
+    """
+    Sudoku engine that works on the grid itself instead of a CNF encoding.
+
+    The digits placed in every row, column and box are bit masks (bit d - 1
+    for digit d), so the candidates of a cell are the complement of three
+    ORs. Propagation places naked singles (a cell with one candidate) and
+    hidden singles (a digit with one place left in a unit, found with two
+    masks per unit: digits seen once and digits seen more than once) until
+    neither applies. The search branches on the empty cell with the fewest
+    candidates, trying its digits in increasing order, and undoes placements
+    through a trail, from an explicit stack like DPLL.
+
+    Takes a grid of any size n^2 x n^2 (0 for empty cells) and returns the
+    same (result, assignments, evaluations, backtracks) as the SAT solvers,
+    the assignments in the numbering of `var` (dense by default, as
+    sudoku_encoding; sudoku_codec.legacy_var for the rules files). Takes
+    the same time, decision and conflict limits as the SAT solvers.
+    """
+
+    grid_input = True  # batch.solve_many hands it grids instead of clauses
+
+    def __init__(self, grid, heuristic="mrv", var=dense_var, time_limit=None, max_decisions=None,
+                 max_conflicts=None):
+        self.size = len(grid)
+        self.heuristic = heuristic
+        self.var = var
+        size = self.size
+        rows, cols, boxes, box_of = sudoku_units(size)
+        self.units = rows + cols + boxes
+        self.row_of = [cell // size for cell in range(size * size)]
+        self.col_of = [cell % size for cell in range(size * size)]
+        self.box_of = box_of
+        self.full = (1 << size) - 1
+        self.cells = [0] * (size * size)  # Placed digit bit per cell, 0 if empty
+        self.row_used = [0] * size
+        self.col_used = [0] * size
+        self.box_used = [0] * size
+        self.trail = []  # Cells in the order they were filled
+        self.num_evaluations = 0
+        self.num_backtracking = 0
+        self.num_decisions = 0
+        self.num_conflicts = 0
+        self.budget = Budget.from_limits(time_limit, max_decisions, max_conflicts)
+        self.stopped_by = None
+        self.consistent = True
+        for r, row in enumerate(grid):
+            for c, value in enumerate(row):
+                if value and not self.__place(r * size + c, 1 << (value - 1)):
+                    self.consistent = False
+
+    def __place(self, cell, bit):
+        """
+        Puts a digit bit in an empty cell. Returns False if its row, column
+        or box already has that digit.
+        """
+        r = self.row_of[cell]
+        c = self.col_of[cell]
+        b = self.box_of[cell]
+        if (self.row_used[r] | self.col_used[c] | self.box_used[b]) & bit:
+            return False
+        self.cells[cell] = bit
+        self.row_used[r] |= bit
+        self.col_used[c] |= bit
+        self.box_used[b] |= bit
+        self.trail.append(cell)
+        return True
+
+    def __undo(self, trail_size):
+        """
+        Empties the cells filled since the trail had the given size.
+        """
+        cells = self.cells
+        trail = self.trail
+        for cell in trail[trail_size:]:
+            mask = ~cells[cell]
+            self.row_used[self.row_of[cell]] &= mask
+            self.col_used[self.col_of[cell]] &= mask
+            self.box_used[self.box_of[cell]] &= mask
+            cells[cell] = 0
+        del trail[trail_size:]
+
+    def candidates(self, cell):
+        """
+        Returns the candidate mask of an empty cell.
+        """
+        return self.full & ~(self.row_used[self.row_of[cell]] | self.col_used[self.col_of[cell]]
+                             | self.box_used[self.box_of[cell]])
+
+    def __propagate(self):
+        """
+        Places naked and hidden singles until there are none left.
+        Returns False if a cell has no candidate or a unit cannot take a digit.
+        """
+        cells = self.cells
+        full = self.full
+        candidates = self.candidates
+        changed = True
+        while changed:
+            changed = False
+
+            # Naked singles
+            for cell in range(len(cells)):
+                if cells[cell]:
+                    continue
+                mask = candidates(cell)
+                if mask == 0:
+                    return False
+                if mask & (mask - 1) == 0:
+                    self.__place(cell, mask)
+                    changed = True
+
+            # Hidden singles
+            for unit in self.units:
+                once = twice = placed = 0
+                for cell in unit:
+                    if cells[cell]:
+                        placed |= cells[cell]
+                        continue
+                    mask = candidates(cell)
+                    twice |= once & mask
+                    once |= mask
+                if (once | placed) != full:
+                    return False  # Some digit has no place left in this unit
+                single = once & ~twice & ~placed
+                while single:
+                    bit = single & -single
+                    single ^= bit
+                    for cell in unit:
+                        if not cells[cell] and candidates(cell) & bit:
+                            if not self.__place(cell, bit):
+                                return False
+                            changed = True
+                            break
+        return True
+
+    def __choose_cell(self):
+        """
+        Returns the empty cell with the fewest candidates, or None if the grid is full.
+        """
+        cells = self.cells
+        best = None
+        best_count = self.size + 1
+        for cell in range(len(cells)):
+            if not cells[cell]:
+                count = self.candidates(cell).bit_count()
+                if count < best_count:
+                    best, best_count = cell, count
+                    if count <= 2:
+                        break
+        return best
+
+    def __solve__(self):
+        """
+        Depth-first search over the candidates of the most constrained cell.
+        Returns None if the budget runs out first.
+        """
+        if not self.consistent:
+            return False
+        branches = []  # [cell, digits left to try, trail size before the cell]
+        budget = self.budget
+        if budget is not None:
+            budget.start()
+        while True:
+            if budget is not None:
+                self.stopped_by = budget.exhausted(self)
+                if self.stopped_by is not None:
+                    return None  # Out of budget: unknown
+            self.num_evaluations += 1
+            if self.__propagate():
+                cell = self.__choose_cell()
+                if cell is None:
+                    return True
+                branches.append([cell, self.candidates(cell), len(self.trail)])
+            else:
+                self.num_backtracking += 1
+                self.num_conflicts += 1
+
+            # Try the next digit of the latest cell that still has one
+            while branches:
+                cell, remaining, trail_size = branches[-1]
+                self.__undo(trail_size)
+                if remaining:
+                    bit = remaining & -remaining
+                    branches[-1][1] = remaining ^ bit
+                    self.__place(cell, bit)
+                    self.num_decisions += 1
+                    break
+                branches.pop()
+            else:
+                return False
+
+    def grid(self):
+        """
+        Returns the current grid, 0 for empty cells.
+        """
+        size = self.size
+        return [[self.cells[r * size + c].bit_length() for c in range(size)] for r in range(size)]
+
+    def model(self):
+        """
+        Returns the grid as a dictionary of variable to value, every cell and digit included.
+        """
+        size = self.size
+        var = self.var
+        return {var(size, cell // size, cell % size, digit): self.cells[cell] == 1 << digit
+                for cell in range(size * size) for digit in range(size)}
+
+    def solve(self):
+        """
+        Runs the bitmask search and prints its outcome, see solve_result.run_solver
+        for the quiet version. Returns the result, assignments, and statistics.
+        """
+        print(f"\nStarting bitmask Sudoku solver ({self.size}x{self.size})...")
+        result = run_solver(self)
+        print_outcome(result)
+        return result.as_tuple()
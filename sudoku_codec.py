@@ -0,0 +1,243 @@
+import argparse
+import os
+import sys
+from sudoku_encoding import ENCODINGS, AT_MOST_ONE, cell_var, encode_sudoku
+
+EMPTY = ".0"  # Characters that mark an empty cell (unless they are a digit symbol)
+
+
+def dense_var(size, row, col, digit):
+    """
+    Dense numbering r*n*n + c*n + d + 1 with 0-based row, column and digit
+    index, the same as sudoku_encoding.cell_var. Variables are 1..n^3.
+    """
+    return cell_var(size, row, col, digit)
+
+
+def legacy_var(size, row, col, digit):
+    """
+    Numbering of the shipped sudoku-rules-*.txt files and output_cnfs:
+    1-based row, column and digit in base 10 up to 9x9 (111..999) and in
+    base n + 1 above (289 * row + 17 * column + digit for 16x16).
+    """
+    base = 10 if size <= 9 else size + 1
+    return base * base * (row + 1) + base * (col + 1) + digit + 1
+
+
+def symbols(size):
+    """
+    Returns the characters of the digits 1..size: 1-9 then A-Z, or 0-9 and
+    A-Z for 36x36, which needs 36 symbols.
+    """
+    alphabet = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    if size > len(alphabet):
+        alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    if size > len(alphabet):
+        raise ValueError(f"No symbol set for {size}x{size} grids")
+    return alphabet[:size]
+
+
+def grid_size(num_cells):
+    """
+    Returns n^2 for a puzzle of n^4 cells, or None if there is no such n.
+    """
+    box = int(round(num_cells ** 0.25))
+    return box * box if box ** 4 == num_cells and box > 1 else None
+
+
+def parse_grid(line):
+    """
+    Parses a one-line puzzle of any box size into a grid of digits, 0 for
+    empty cells. Returns None if the line is not a whole number of cells.
+    """
+    line = line.strip()
+    size = grid_size(len(line))
+    if size is None:
+        return None
+    digit_of = {symbol: digit for digit, symbol in enumerate(symbols(size), start=1)}
+    cells = []
+    for char in line.upper():
+        if char in digit_of:
+            cells.append(digit_of[char])
+        elif char in EMPTY:
+            cells.append(0)
+        else:
+            raise ValueError(f"Unexpected character {char!r} in a {size}x{size} puzzle")
+    return [cells[r * size:(r + 1) * size] for r in range(size)]
+
+
+def format_grid(grid):
+    """
+    Returns the one-line form of a grid, '.' for empty cells.
+    """
+    alphabet = symbols(len(grid))
+    return "".join(alphabet[value - 1] if value else "." for row in grid for value in row)
+
+
+def iter_puzzles(source, size=None):
+    """
+    Yields the puzzles of a text with one puzzle per line, one at a time, so
+    a file of any length is read in constant memory. `source` is a file path,
+    "-" for standard input or an open text file. Lines that are not a whole
+    puzzle are skipped, as are puzzles of another size if one is given.
+    """
+    if source == "-":
+        source = sys.stdin
+    if isinstance(source, str):
+        with open(source, 'r') as f:
+            yield from iter_puzzles(f, size)
+        return
+    for line in source:
+        grid = parse_grid(line)
+        if grid is not None and (size is None or len(grid) == size):
+            yield grid
+
+
+def read_puzzles(file_path):
+    """
+    Reads every puzzle of a text file with one puzzle per line.
+    """
+    return list(iter_puzzles(file_path))
+
+
+def clue_literals(grid, var=dense_var):
+    """
+    Returns one positive literal per filled cell of a grid.
+    """
+    size = len(grid)
+    return [var(size, r, c, value - 1) for r, row in enumerate(grid) for c, value in enumerate(row) if value]
+
+
+def puzzle_to_cnf(grid, encoding="extended", at_most_one="pairwise"):
+    """
+    Encodes a puzzle with dense numbering. Returns a ClauseStore and the
+    number of variables, see sudoku_encoding.encode_sudoku.
+    """
+    return encode_sudoku(grid, encoding, at_most_one)
+
+
+def write_cnf(grid, output_file, encoding="extended", at_most_one="pairwise"):
+    """
+    Writes the DIMACS CNF of a puzzle, dense numbering, to a file.
+    """
+    store, num_vars = puzzle_to_cnf(grid, encoding, at_most_one)
+    with open(output_file, 'w') as f:
+        f.write(f"p cnf {num_vars} {len(store)}\n")
+        for index in range(len(store)):
+            f.write(" ".join(str(store.decode(code)) for code in store.clause(index)) + " 0\n")
+
+
+def model_to_grid(assignments, size, var=dense_var):
+    """
+    Builds the grid a model describes: a dict of DIMACS variable to value,
+    as the solvers return it. Cells without a true variable stay 0.
+    """
+    cell_of = {var(size, r, c, d): (r, c, d + 1) for r in range(size) for c in range(size) for d in range(size)}
+    grid = [[0] * size for _ in range(size)]
+    for variable, value in assignments.items():
+        if value and variable in cell_of:
+            r, c, digit = cell_of[variable]
+            grid[r][c] = digit
+    return grid
+
+
+def model_size(assignments, var=dense_var):
+    """
+    Returns the grid size of a model: the smallest n^2 x n^2 grid whose
+    largest variable covers every variable of the model, or 0 for an empty
+    model. Works for any numbering that grows with the grid, such as the
+    n^3 of dense_var or the legacy base-(n + 1) range.
+    """
+    largest = max((variable for variable in assignments), default=0)
+    if largest <= 0:
+        return 0
+    box = 2
+    while var(box * box, box * box - 1, box * box - 1, box * box - 1) < largest:
+        box += 1
+    return box * box
+
+
+def format_board(grid):
+    """
+    Returns a grid as text with box separators.
+    """
+    size = len(grid)
+    box = int(round(size ** 0.5))
+    alphabet = symbols(size)
+    width = len(alphabet[-1])
+    line = "  " + "-" * (size * (width + 1) + 2 * box + 1)
+    lines = [line]
+    for r, row in enumerate(grid):
+        if r % box == 0 and r != 0:
+            lines.append(line)
+        cells = ""
+        for c, value in enumerate(row):
+            if c % box == 0 and c != 0:
+                cells += " |"
+            cells += " " + (alphabet[value - 1] if value else ".")
+        lines.append(f"  |{cells} |")
+    lines.append(line)
+    return "\n".join(lines)
+
+
+def read_rules(rules_file):
+    """
+    Returns the declared variable count and the clause lines of a rules file.
+    """
+    num_vars = 0
+    clause_lines = []
+    with open(rules_file, 'r') as f:
+        for line in f:
+            if line.startswith('p'):
+                num_vars = int(line.split()[2])
+            elif not line.startswith('c'):
+                clause_lines.append(line)
+    return num_vars, clause_lines
+
+
+def write_rules_cnf(grid, rules, output_file):
+    """
+    Writes a rules file (as returned by read_rules) plus the clue units of
+    a puzzle in legacy numbering, which is how output_cnfs was made.
+    """
+    num_vars, clause_lines = rules
+    clues = clue_literals(grid, legacy_var)
+    with open(output_file, 'w') as f:
+        f.write(f"p cnf {num_vars} {len(clause_lines) + len(clues)}\n")
+        f.writelines(clause_lines)
+        f.writelines(f"{literal} 0\n" for literal in clues)
+
+
+def generate_cnfs(txt_file, output_pattern, rules_file=None, encoding="extended", at_most_one="pairwise"):
+    """
+    Writes one CNF file per puzzle of a text file; output_pattern has a {}
+    for the 1-based puzzle number. With a rules file each puzzle is that
+    file's rules plus its clues, otherwise the whole puzzle is encoded with
+    dense numbering. Puzzles are read one at a time. Returns the number of puzzles.
+    """
+    rules = read_rules(rules_file) if rules_file is not None else None
+    count = 0
+    for count, grid in enumerate(iter_puzzles(txt_file), start=1):
+        output_file = output_pattern.format(count)
+        if rules is None:
+            write_cnf(grid, output_file, encoding, at_most_one)
+        else:
+            write_rules_cnf(grid, rules, output_file)
+        print(f"Generated CNF for Sudoku {count}: {output_file}")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encode one-line Sudoku puzzles of any size as CNF files.")
+    parser.add_argument("txt_file")
+    parser.add_argument("output_folder")
+    parser.add_argument("--prefix", help="file name prefix, defaults to the grid size")
+    parser.add_argument("--encoding", default="extended", choices=ENCODINGS)
+    parser.add_argument("--at-most-one", default="pairwise", choices=AT_MOST_ONE)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    first = next(iter_puzzles(args.txt_file), None)
+    prefix = args.prefix or (f"{len(first)}x{len(first)}" if first else "sudoku")
+    generate_cnfs(args.txt_file, os.path.join(args.output_folder, prefix + "_{}.cnf"),
+                  encoding=args.encoding, at_most_one=args.at_most_one)
@@ -0,0 +1,178 @@
+import time
+from array import array
+from itertools import combinations
+from dimacs_parser import build_store, load_dimacs
+from sudoku_preprocess import sudoku_units
+
+ENCODINGS = ("minimal", "extended")
+AT_MOST_ONE = ("pairwise", "sequential", "commander")
+
+
+def cell_var(size, row, col, digit):
+    """
+    Returns the variable of `digit` in cell (row, col), all 0-based.
+    """
+    return row * size * size + col * size + digit + 1
+
+
+class CNFBuilder:
+    """
+    Writes clauses straight into flat DIMACS literal, offset and length
+    arrays, and hands out auxiliary variables above the problem variables.
+    """
+
+    def __init__(self, num_vars):
+        self.literals = array('i')
+        self.offsets = array('i')
+        self.lengths = array('i')
+        self.num_vars = num_vars
+
+    def new_var(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def add(self, clause):
+        self.offsets.append(len(self.literals))
+        self.lengths.append(len(clause))
+        self.literals.extend(clause)
+
+    def at_least_one(self, literals):
+        self.add(literals)
+
+    def at_most_one(self, literals, method="pairwise"):
+        """
+        Forbids two of the literals from being true together. Groups of up to
+        four literals always use the pairwise encoding.
+        """
+        if len(literals) <= 4 or method == "pairwise":
+            for a, b in combinations(literals, 2):
+                self.add([-a, -b])
+        elif method == "sequential":
+            self.__sequential_counter(literals)
+        elif method == "commander":
+            self.__commander(literals)
+        else:
+            raise ValueError(f"Unknown at-most-one encoding '{method}', expected one of {list(AT_MOST_ONE)}")
+
+    def __sequential_counter(self, literals):
+        """
+        Sinz's sequential counter: s_i is true once one of the first i
+        literals is true, 3n - 4 clauses over n - 1 auxiliary variables.
+        """
+        counters = [self.new_var() for _ in range(len(literals) - 1)]
+        self.add([-literals[0], counters[0]])
+        for i in range(1, len(literals) - 1):
+            self.add([-literals[i], counters[i]])
+            self.add([-counters[i - 1], counters[i]])
+            self.add([-literals[i], -counters[i - 1]])
+        self.add([-literals[-1], -counters[-1]])
+
+    def __commander(self, literals, group_size=3):
+        """
+        Klieber and Kwon's commander encoding: the literals are split into
+        groups, each group gets pairwise at-most-one and a commander variable
+        that is true if any of its literals is, and the commanders get the
+        same treatment recursively.
+        """
+        commanders = []
+        for start in range(0, len(literals), group_size):
+            group = literals[start:start + group_size]
+            commander = self.new_var()
+            commanders.append(commander)
+            for a, b in combinations(group, 2):
+                self.add([-a, -b])
+            for literal in group:
+                self.add([commander, -literal])
+        self.at_most_one(commanders, "commander")
+
+
+def fixed_by_clues(grid):
+    """
+    Returns the variables the clues make true and those they directly make
+    false: the other digits of a clue cell and the clue digit in its peers.
+    """
+    size = len(grid)
+    rows, cols, boxes, box_of = sudoku_units(size)
+    true_vars = set()
+    false_vars = set()
+    for r, row in enumerate(grid):
+        for c, value in enumerate(row):
+            if not value:
+                continue
+            digit = value - 1
+            true_vars.add(cell_var(size, r, c, digit))
+            false_vars.update(cell_var(size, r, c, d) for d in range(size) if d != digit)
+            for cell in rows[r] + cols[c] + boxes[box_of[r * size + c]]:
+                if cell != r * size + c:
+                    false_vars.add(cell_var(size, cell // size, cell % size, digit))
+    return true_vars, false_vars
+
+
+def encode_sudoku(grid, encoding="extended", at_most_one="pairwise"):
+    """
+    Encodes a Sudoku grid of any size n^2 x n^2 (0 for empty cells) as a
+    ClauseStore, with cell_var numbering.
+
+    The minimal encoding says every cell has a digit and no digit repeats in
+    a row, column or box. The extended encoding adds that a cell has at most
+    one digit and every digit appears in every row, column and box, which
+    is redundant but propagates more. At-most-one constraints use the
+    pairwise, sequential counter or commander encoding; the last two trade
+    auxiliary variables for far fewer clauses on large grids.
+
+    Only clue-relevant clauses are kept: the clues are unit clauses, and
+    constraints are built over the variables the clues do not already fix,
+    so clauses the clues satisfy are never generated.
+    Returns the store and the number of variables including auxiliary ones.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding '{encoding}', expected one of {list(ENCODINGS)}")
+    size = len(grid)
+    rows, cols, boxes, _ = sudoku_units(size)
+    true_vars, false_vars = fixed_by_clues(grid)
+    builder = CNFBuilder(size ** 3)
+
+    for var in sorted(true_vars):
+        builder.add([var])
+    if true_vars & false_vars:
+        builder.add([])  # Two clues contradict each other
+
+    def constrain(variables, at_least, at_most):
+        if true_vars.intersection(variables):
+            return  # Satisfied, and every other variable is fixed false already
+        free = [var for var in variables if var not in false_vars]
+        if at_least:
+            builder.at_least_one(free)  # Empty when the clues leave no option
+        if at_most and len(free) > 1:
+            builder.at_most_one(free, at_most_one)
+
+    extended = encoding == "extended"
+    for r in range(size):
+        for c in range(size):
+            constrain([cell_var(size, r, c, d) for d in range(size)], True, extended)
+    for unit in rows + cols + boxes:
+        for d in range(size):
+            constrain([cell_var(size, cell // size, cell % size, d) for cell in unit], extended, True)
+
+    return build_store(builder.literals, builder.offsets, builder.lengths), builder.num_vars
+
+
+def main():
+    rules = {9: "sudoku-rules-9x9.txt", 16: "sudoku-rules-16x16.txt"}
+    for size in (9, 16, 25):
+        grid = [[0] * size for _ in range(size)]
+        if size in rules:
+            start_time = time.perf_counter()
+            store, _ = load_dimacs(rules[size])
+            print(f"{rules[size]:28} {len(store):8} clauses {store.num_vars:7} vars "
+                  f"{len(store.literals):9} literals {time.perf_counter() - start_time:7.3f} s")
+        for encoding in ENCODINGS:
+            for method in AT_MOST_ONE:
+                start_time = time.perf_counter()
+                store, _ = encode_sudoku(grid, encoding, method)
+                print(f"{size}x{size} {encoding:9} {method:10}   {len(store):8} clauses {store.num_vars:7} vars "
+                      f"{len(store.literals):9} literals {time.perf_counter() - start_time:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import time
+from itertools import combinations
+
+
+def sudoku_units(size):
+    """
+    Returns the rows, columns and boxes of a size x size grid as lists of
+    cell indices (row * size + column), and the box of every cell.
+    """
+    box = int(round(size ** 0.5))
+    if box * box != size:
+        raise ValueError(f"Grid size {size} is not a square")
+    rows = [[r * size + c for c in range(size)] for r in range(size)]
+    cols = [[r * size + c for r in range(size)] for c in range(size)]
+    boxes = [[(br + dr) * size + bc + dc for dr in range(box) for dc in range(box)]
+             for br in range(0, size, box) for bc in range(0, size, box)]
+    box_of = [0] * (size * size)
+    for index, cells in enumerate(boxes):
+        for cell in cells:
+            box_of[cell] = index
+    return rows, cols, boxes, box_of
+
+
+def digits(mask):
+    """
+    Returns the digits (starting at 1) whose bits are set in a candidate mask.
+    """
+    found = []
+    digit = 1
+    while mask:
+        if mask & 1:
+            found.append(digit)
+        mask >>= 1
+        digit += 1
+    return found
+
+
+def reduce_candidates(grid):
+    """
+    Computes the candidate digits of every cell of a grid (0 for empty) with
+    naked singles, hidden singles, pointing pairs and box-line reduction,
+    repeated until none of them removes anything.
+
+    Candidates are bit masks, bit d - 1 standing for digit d. Returns the
+    list of masks in row-major order, or None if the clues contradict each
+    other (a cell or a unit runs out of candidates).
+    """
+    size = len(grid)
+    rows, cols, boxes, box_of = sudoku_units(size)
+    units = rows + cols + boxes
+    full = (1 << size) - 1
+    candidates = [1 << (value - 1) if value else full for row in grid for value in row]
+    placed = [False] * (size * size)  # Solved cells whose digit was removed from their peers
+    peers = [set() for _ in range(size * size)]
+    for unit in units:
+        for cell in unit:
+            peers[cell].update(unit)
+    for cell in range(size * size):
+        peers[cell].discard(cell)
+
+    changed = True
+    while changed:
+        changed = False
+
+        # Naked singles: a solved cell removes its digit from its peers
+        stack = [cell for cell in range(size * size) if not placed[cell] and candidates[cell] & (candidates[cell] - 1) == 0]
+        while stack:
+            cell = stack.pop()
+            if placed[cell]:
+                continue
+            placed[cell] = True
+            bit = candidates[cell]
+            if bit == 0:
+                return None
+            for peer in peers[cell]:
+                if candidates[peer] & bit:
+                    candidates[peer] &= ~bit
+                    if candidates[peer] == 0:
+                        return None
+                    if candidates[peer] & (candidates[peer] - 1) == 0:
+                        stack.append(peer)
+                    changed = True
+
+        # Hidden singles: a digit with a single place left in a unit
+        for unit in units:
+            for digit in range(size):
+                bit = 1 << digit
+                places = [cell for cell in unit if candidates[cell] & bit]
+                if not places:
+                    return None
+                if len(places) == 1 and candidates[places[0]] != bit:
+                    candidates[places[0]] = bit
+                    changed = True
+        if changed:
+            continue
+
+        # Pointing pairs: a digit confined to one row or column inside a box
+        # cannot appear in the rest of that row or column
+        for cells in boxes:
+            for digit in range(size):
+                bit = 1 << digit
+                places = [cell for cell in cells if candidates[cell] & bit]
+                if len(places) < 2:
+                    continue
+                for lines, line_of in ((rows, lambda cell: cell // size), (cols, lambda cell: cell % size)):
+                    line = {line_of(cell) for cell in places}
+                    if len(line) == 1:
+                        for cell in lines[line.pop()]:
+                            if box_of[cell] != box_of[places[0]] and candidates[cell] & bit:
+                                candidates[cell] &= ~bit
+                                changed = True
+
+        # Box-line reduction: a digit confined to one box inside a row or
+        # column cannot appear in the rest of that box
+        for line in rows + cols:
+            for digit in range(size):
+                bit = 1 << digit
+                places = [cell for cell in line if candidates[cell] & bit]
+                if len(places) < 2:
+                    continue
+                box_ids = {box_of[cell] for cell in places}
+                if len(box_ids) == 1:
+                    on_line = set(line)
+                    for cell in boxes[box_ids.pop()]:
+                        if cell not in on_line and candidates[cell] & bit:
+                            candidates[cell] &= ~bit
+                            changed = True
+
+        if any(mask == 0 for mask in candidates):
+            return None
+    return candidates
+
+
+def residual_formula(grid):
+    """
+    Encodes what is left of a puzzle after reduce_candidates as CNF.
+
+    Only the remaining candidates of unsolved cells become variables,
+    numbered densely from 1. Every unsolved cell gets an at-least-one and
+    pairwise at-most-one clauses over its candidates, and every digit still
+    missing from a row, column or box gets the same over the cells that can
+    take it. Returns the clauses as a dict (like parse_cnf), the number of
+    variables, the (row, column, digit) of each variable (0-based cells,
+    digits from 1) and the grid of cells solved by the elimination, 0 for
+    the rest, for solution_grid. Contradictory clues give a single empty
+    clause and no solved grid.
+    """
+    size = len(grid)
+    candidates = reduce_candidates(grid)
+    if candidates is None:
+        return {0: []}, 0, [], None
+    rows, cols, boxes, _ = sudoku_units(size)
+    solved_cells = [[0] * size for _ in range(size)]
+    for cell, mask in enumerate(candidates):
+        if mask & (mask - 1) == 0:
+            solved_cells[cell // size][cell % size] = mask.bit_length()
+
+    variables = []
+    var_of = {}
+    for cell, mask in enumerate(candidates):
+        if mask & (mask - 1):
+            for digit in digits(mask):
+                variables.append((cell // size, cell % size, digit))
+                var_of[cell, digit] = len(variables)
+
+    clauses = []
+
+    def exactly_one(literals):
+        clauses.append(literals)
+        clauses.extend([-a, -b] for a, b in combinations(literals, 2))
+
+    for cell, mask in enumerate(candidates):
+        if mask & (mask - 1):
+            exactly_one([var_of[cell, digit] for digit in digits(mask)])
+    for unit in rows + cols + boxes:
+        for digit in range(1, size + 1):
+            literals = [var_of[cell, digit] for cell in unit if (cell, digit) in var_of]
+            solved = any(candidates[cell] == 1 << (digit - 1) for cell in unit)
+            if literals and not solved:
+                exactly_one(literals)
+    return dict(enumerate(clauses)), len(variables), variables, solved_cells
+
+
+def solution_grid(solved_cells, variables, assignments):
+    """
+    Combines the cells solved by preprocessing (as returned by
+    residual_formula) with a model of the residual formula, keyed by
+    residual variable, into the completed grid.
+    """
+    solved = [list(row) for row in solved_cells]
+    for var, (r, c, digit) in enumerate(variables, start=1):
+        if assignments.get(var):
+            solved[r][c] = digit
+    return solved
+
+
+def main():
+    from CDCL import CDCL
+    from DPLL import DPLL
+    from JW import JW
+    from create_sudoku_9 import parse_sudoku_txt
+    import contextlib
+    import io
+
+    puzzles = parse_sudoku_txt("top100.txt")
+    sizes = []
+    for grid in puzzles:
+        _, num_vars, _, _ = residual_formula(grid)
+        sizes.append(num_vars)
+    print(f"Residual variables over {len(puzzles)} puzzles: "
+          f"mean {sum(sizes) / len(sizes):.1f} of 729, min {min(sizes)}, max {max(sizes)}, "
+          f"solved outright {sizes.count(0)}")
+
+    for solver_class in (CDCL, DPLL, JW):
+        start_time = time.time()
+        evaluations = 0
+        for grid in puzzles:
+            clauses, _, _, _ = residual_formula(grid)
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, _, evals, _ = solver_class(clauses).solve()
+            evaluations += evals
+        print(f"{solver_class.__name__:5} {time.time() - start_time:7.2f} s, {evaluations} evaluations")
+
+
+if __name__ == "__main__":
+    main()
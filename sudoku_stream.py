@@ -0,0 +1,92 @@
+import argparse
+import csv
+import itertools
+import sys
+import time
+from CDCL import CDCL
+from DPLL import DPLL
+from JW import JW
+from batch import TIME_LIMIT, solve_many
+from sudoku_bitmask import BitmaskSudoku
+from sudoku_codec import iter_puzzles
+from sudoku_vectorized import solve_batch
+
+SOLVERS = {"BITMASK": BitmaskSudoku, "CDCL": CDCL, "DPLL": DPLL, "JW": JW}
+FIELDS = ["puzzle", "status", "solution", "evaluations", "backtracks", "restarts", "time_taken"]
+
+
+def solve_stream(source, solver_class, heuristic=None, workers=None, timeout=TIME_LIMIT):
+    """
+    Solves every puzzle of a line-per-puzzle text, read lazily from a file
+    path, "-" for standard input or an open file. Each puzzle is encoded in
+    memory by the worker that solves it, no CNF files are written, and only
+    a bounded window of puzzles is in flight, so memory stays constant
+    whatever the input size. Yields (index, result) pairs in completion
+    order, see batch.solve_many.
+    """
+    return solve_many(iter_puzzles(source), solver_class, workers=workers, heuristic=heuristic, timeout=timeout)
+
+
+def solve_stream_vectorized(source, solver_class, heuristic=None, batch_size=1024, timeout=TIME_LIMIT):
+    """
+    Solves the puzzles of a line-per-puzzle text in this process,
+    `batch_size` puzzles of the same size at a time with
+    sudoku_vectorized.solve_batch, each search limited to `timeout`
+    seconds. Yields (index, result) pairs in input order; memory grows with
+    the batch size, not the input.
+    """
+    puzzles = enumerate(iter_puzzles(source))
+    while True:
+        chunk = list(itertools.islice(puzzles, batch_size))
+        if not chunk:
+            return
+        for size, group in itertools.groupby(chunk, key=lambda item: len(item[1])):
+            indices, grids = zip(*group)
+            yield from zip(indices, solve_batch(list(grids), solver_class, heuristic, timeout))
+
+
+def write_results(results, output):
+    """
+    Writes (index, result) pairs as CSV rows as they arrive, puzzles numbered
+    from 1 in input order. Returns the number of rows written.
+    """
+    writer = csv.writer(output)
+    writer.writerow(FIELDS)
+    count = 0
+    for index, result in results:
+        writer.writerow([index + 1, result["status"], result.get("solution", ""), result["evaluations"],
+                         result["backtracks"], result["restarts"], f"{result['time_taken']:.6f}"])
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a stream of one-line Sudoku puzzles without intermediate CNF files.")
+    parser.add_argument("source", nargs="?", default="-", help="puzzle file, '-' for standard input")
+    parser.add_argument("--solver", default="CDCL", choices=sorted(SOLVERS))
+    parser.add_argument("--heuristic", help="branching heuristic, defaults to the solver's own")
+    parser.add_argument("--workers", type=int, help="worker processes, defaults to the number of cores")
+    parser.add_argument("--timeout", type=float, default=TIME_LIMIT, help="per-puzzle time limit in seconds")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="propagate batches of puzzles with NumPy in this process, search only the stalled ones")
+    parser.add_argument("--batch-size", type=int, default=1024, help="puzzles per vectorized batch")
+    parser.add_argument("--output", default="-", help="CSV output file, '-' for standard output")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if args.vectorized:
+        results = solve_stream_vectorized(args.source, SOLVERS[args.solver], args.heuristic, args.batch_size,
+                                          args.timeout)
+    else:
+        results = solve_stream(args.source, SOLVERS[args.solver], args.heuristic, args.workers, args.timeout)
+    if args.output == "-":
+        count = write_results(results, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as output:
+            count = write_results(results, output)
+    elapsed_time = time.time() - start_time
+    print(f"Solved {count} puzzles in {elapsed_time:.2f} seconds", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import time
+import numpy as np
+from CDCL import CDCL
+from solve_result import run_solver
+from sudoku_codec import format_grid, model_to_grid
+from sudoku_encoding import cell_var, encode_sudoku
+from sudoku_preprocess import sudoku_units
+
+STALLED, SOLVED, CONTRADICTION = 0, 1, 2
+
+
+class GridIndex:
+    """
+    Index arrays of a grid size for the vectorized rules.
+
+    units holds the cells of every row, column and box (rows first, then
+    columns, then boxes) and cell_units the three units of every cell. A
+    segment is the intersection of a box and a row or column; per direction,
+    segments[s] are its cells, segment_of the segment of every cell,
+    segment_line / segment_box the line and box of every segment, and
+    line_segments / box_segments the segments of every line and box.
+    """
+
+    def __init__(self, size):
+        rows, cols, boxes, box_of = sudoku_units(size)
+        box = int(round(size ** 0.5))
+        self.size = size
+        self.units = np.array(rows + cols + boxes, dtype=np.intp)
+        self.cell_units = np.array([[cell // size, size + cell % size, 2 * size + box_of[cell]]
+                                    for cell in range(size * size)], dtype=np.intp)
+        self.directions = []
+        for lines in (rows, cols):
+            segments = [line[start:start + box] for line in lines for start in range(0, size, box)]
+            segment_of = np.empty(size * size, dtype=np.intp)
+            for index, cells in enumerate(segments):
+                segment_of[cells] = index
+            segment_line = np.arange(len(segments)) // box
+            segment_box = np.array([box_of[cells[0]] for cells in segments], dtype=np.intp)
+            line_segments = np.arange(len(segments)).reshape(size, box)
+            box_segments = np.argsort(segment_box, kind="stable").reshape(size, box)
+            self.directions.append((np.array(segments, dtype=np.intp), segment_of, segment_line, segment_box,
+                                    line_segments, box_segments))
+
+
+def candidate_array(grids):
+    """
+    Stacks puzzles of the same size into an (N, cells, digits) boolean array
+    of candidates: a clue allows only its digit, an empty cell allows all.
+    """
+    values = np.asarray(grids, dtype=np.intp).reshape(len(grids), -1)
+    size = int(round(values.shape[1] ** 0.5))
+    candidates = np.ones((len(grids), size * size, size), dtype=bool)
+    clues = values > 0
+    candidates[clues] = np.arange(1, size + 1) == values[clues][:, None]
+    return candidates
+
+
+def locked_candidates(state, index):
+    """
+    Returns the candidates that pointing pairs and box-line reduction remove:
+    a digit that a box only allows in one segment cannot go elsewhere in
+    that segment's line, and one that a line only allows in one segment
+    cannot go elsewhere in that segment's box.
+    """
+    remove = np.zeros_like(state)
+    for segments, segment_of, segment_line, segment_box, line_segments, box_segments in index.directions:
+        present = state[:, segments, :].any(axis=2)
+        in_box = present[:, box_segments, :].sum(axis=2)
+        in_line = present[:, line_segments, :].sum(axis=2)
+        pointing = (present & (in_box[:, segment_box, :] == 1)).astype(np.int8)
+        claiming = (present & (in_line[:, segment_line, :] == 1)).astype(np.int8)
+        elsewhere = ((pointing[:, line_segments, :].sum(axis=2)[:, segment_line, :] > pointing)
+                     | (claiming[:, box_segments, :].sum(axis=2)[:, segment_box, :] > claiming))
+        remove |= elsewhere[:, segment_of, :]
+    return remove
+
+
+def propagate(candidates, index):
+    """
+    Applies naked singles, hidden singles and locked candidates to every
+    puzzle of a candidate array at once, in place, until no puzzle changes
+    any more. The singles are unit propagation on the extended encoding: a
+    cell with one candidate removes its digit from its peers (cell and unit
+    at-most-one clauses), a digit with one place left in a unit goes there
+    (unit at-least-one); locked candidates go one step further, as
+    sudoku_preprocess.reduce_candidates does.
+
+    Each round works on the puzzles still changing only. Returns the status
+    of every puzzle, SOLVED, CONTRADICTION (a cell without candidates, a
+    digit without a place or placed twice in a unit) or STALLED, and the
+    number of rounds.
+    """
+    num_puzzles, num_cells, size = candidates.shape
+    units = index.units
+    cell_units = index.cell_units
+    groups = [units[k * size:(k + 1) * size].ravel() for k in range(3)]
+    status = np.full(num_puzzles, STALLED, dtype=np.int8)
+    active = np.arange(num_puzzles)
+    rounds = 0
+    while len(active):
+        rounds += 1
+        state = candidates[active]
+        before = state.sum(axis=(1, 2))
+
+        # Naked singles
+        single = state & (state.sum(axis=2) == 1)[:, :, None]
+        placed = single[:, units, :].sum(axis=2)
+        clash = (placed > 1).any(axis=(1, 2))
+        state &= single | ~(placed[:, cell_units, :] > 0).any(axis=2)
+
+        # Hidden singles
+        in_units = state[:, units, :]
+        places = in_units.sum(axis=2)
+        missing = (places == 0).any(axis=(1, 2))
+        only = in_units & (places == 1)[:, :, None, :]
+        hidden = np.zeros_like(state)
+        for k, cells in enumerate(groups):
+            hidden[:, cells] |= only[:, k * size:(k + 1) * size].reshape(len(active), num_cells, size)
+        twice = (hidden.sum(axis=2) > 1).any(axis=1)
+        state = np.where(hidden.any(axis=2)[:, :, None], hidden, state)
+        state &= ~locked_candidates(state, index)
+
+        counts = state.sum(axis=2)
+        dead = clash | missing | twice | (counts == 0).any(axis=1)
+        settled = ~dead & (state.sum(axis=(1, 2)) == before)
+        candidates[active] = state
+        status[active[dead]] = CONTRADICTION
+        status[active[settled & (counts == 1).all(axis=1)]] = SOLVED
+        active = active[~dead & ~settled]
+    return status, rounds
+
+
+def grid_of(candidates):
+    """
+    Returns the grid of one puzzle's candidates, cells with a single
+    candidate filled in and the others 0.
+    """
+    num_cells, size = candidates.shape
+    values = np.where(candidates.sum(axis=1) == 1, candidates.argmax(axis=1) + 1, 0)
+    return values.reshape(size, size).tolist()
+
+
+def residual_store(candidates):
+    """
+    Encodes a stalled puzzle for the scalar search: its grid of singles
+    with sudoku_encoding, plus a negative unit clause for every candidate
+    propagation removed from an unsolved cell, so the search starts where
+    the vectorized phase stopped.
+    """
+    num_cells, size = candidates.shape
+    store, _ = encode_sudoku(grid_of(candidates))
+    open_cells = candidates.sum(axis=1) > 1
+    for cell, digit in zip(*np.nonzero(open_cells[:, None] & ~candidates)):
+        store.add_clause([-cell_var(size, cell // size, cell % size, digit)])
+    return store
+
+
+def model_of(candidates):
+    """
+    Returns the model of a solved puzzle, every variable in dense numbering.
+    """
+    assignments = dict.fromkeys(range(1, candidates.size + 1), False)
+    for index in np.flatnonzero(candidates.ravel()):
+        assignments[int(index) + 1] = True
+    return assignments
+
+
+def solve_batch(grids, solver_class=CDCL, heuristic=None, time_limit=None):
+    """
+    Solves puzzles of one size together: propagation runs on all of them
+    as one NumPy array, and only the puzzles it leaves stalled go through
+    the scalar solver, one by one, starting from the reduced candidates
+    (solvers with `grid_input` get the grid of cells propagation filled).
+    Each search gets `time_limit` seconds as its budget and a puzzle it
+    does not decide in time is "UNKNOWN".
+
+    Returns a list of results in input order, dicts like batch.solve_many
+    gives (status, assignments, solution, evaluations, backtracks, restarts,
+    time_taken) with a "stage" of "vectorized" or "search". The vectorized
+    time is shared evenly between the puzzles of the batch.
+    """
+    if not grids:
+        return []
+    start_time = time.time()
+    candidates = candidate_array(grids)
+    status, _ = propagate(candidates, GridIndex(candidates.shape[2]))
+    shared_time = (time.time() - start_time) / len(grids)
+
+    results = []
+    for index, puzzle_status in enumerate(status):
+        result = {"puzzle": index, "solver": solver_class.__name__, "heuristic": heuristic, "stage": "vectorized",
+                  "evaluations": 0, "backtracks": 0, "restarts": 0, "assignments": {}, "time_taken": shared_time}
+        if puzzle_status == SOLVED:
+            result["status"] = "SATISFIABLE"
+            result["assignments"] = model_of(candidates[index])
+            result["solution"] = format_grid(grid_of(candidates[index]))
+        elif puzzle_status == CONTRADICTION:
+            result["status"] = "UNSATISFIABLE"
+        else:
+            search_start = time.time()
+            if getattr(solver_class, "grid_input", False):
+                formula = grid_of(candidates[index])
+            else:
+                formula = residual_store(candidates[index])
+            options = {} if heuristic is None else {"heuristic": heuristic}
+            if time_limit is not None:
+                options["time_limit"] = time_limit
+            solver = solver_class(formula, **options)
+            outcome = run_solver(solver)
+            result.update(stage="search", heuristic=solver.heuristic, evaluations=outcome.stats["evaluations"],
+                          backtracks=outcome.stats["backtracks"], restarts=outcome.stats.get("restarts", 0),
+                          assignments=outcome.model, status=outcome.status)
+            if outcome.satisfiable:
+                result["solution"] = format_grid(model_to_grid(outcome.model, len(grids[index])))
+            result["time_taken"] += time.time() - search_start
+        results.append(result)
+    return results
@@ -0,0 +1,409 @@
+import contextlib
+import io
+import itertools
+import logging
+import random
+import pytest
+import rules_cache
+from benchmark import compare, percentile, summarize
+from CDCL import CDCL, parse_cnf
+from clause_store import ClauseStore
+from cube_and_conquer import Splitter, cube_and_conquer
+from batch import solve_many
+from dimacs_parser import load_dimacs, parse_dimacs
+from DPLL import DPLL
+from JW import JW
+from restarts import LubyRestarts, luby
+from rules_cache import clue_literals, load_base_rules, load_puzzle
+from instrumentation import SolverProfile
+from portfolio import grid_size, race, win_counts
+from solver_api import solve_formula
+from sudoku_bitmask import BitmaskSudoku
+from sudoku_codec import legacy_var, model_to_grid, parse_grid, read_puzzles
+from sudoku_encoding import AT_MOST_ONE, ENCODINGS, encode_sudoku
+from sudoku_vectorized import CONTRADICTION, SOLVED, GridIndex, candidate_array, propagate, solve_batch
+from sudoku_preprocess import reduce_candidates, residual_formula, solution_grid, sudoku_units
+
+# Every solver with every heuristic it accepts
+CONFIGS = [
+    (DPLL, {"heuristic": "order"}),
+    (DPLL, {"heuristic": "vsids"}),
+    (DPLL, {"heuristic": "order", "pure_literals": True}),
+    (JW, {"heuristic": "jw"}),
+    (JW, {"heuristic": "jw-one-sided"}),
+    (JW, {"heuristic": "jw", "pure_literals": True}),
+    (CDCL, {"heuristic": "vsids"}),
+    (CDCL, {"heuristic": "order"}),
+    (CDCL, {"heuristic": "vsids", "restarts": "none", "phase_saving": False}),
+    (CDCL, {"heuristic": "vsids", "restarts": "geometric"}),
+    (CDCL, {"heuristic": "vsids", "restarts": "glucose"}),
+]
+CONFIG_IDS = [f"{solver_class.__name__}-{'-'.join(str(value) for value in options.values())}"
+              for solver_class, options in CONFIGS]
+
+
+def run(solver_class, clauses, **options):
+    """
+    Solves quietly and returns the result tuple of solve().
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solver_class(clauses, **options).solve()
+
+
+def satisfies(assignments, clauses):
+    """
+    Checks that every clause has a literal made true by the model.
+    Tautologies hold under any extension of the model, whose variables the
+    solvers may leave out.
+    """
+    return all(any(assignments.get(abs(literal)) == (literal > 0) or -literal in clause for literal in clause)
+               for clause in clauses)
+
+
+def brute_force(clauses):
+    """
+    Decides satisfiability by trying every assignment of the clause variables.
+    """
+    variables = sorted({abs(literal) for clause in clauses for literal in clause})
+    for values in itertools.product((True, False), repeat=len(variables)):
+        assignments = dict(zip(variables, values))
+        if satisfies(assignments, clauses):
+            return True
+    return False
+
+
+def random_cnf(seed):
+    """
+    Returns a small random formula with clauses of one to four literals,
+    repeated literals and tautologies included.
+    """
+    rng = random.Random(seed)
+    num_vars = rng.randint(3, 10)
+    return [[rng.choice((1, -1)) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 4))]
+            for _ in range(rng.randint(1, 5 * num_vars))]
+
+
+def valid_solution(grid, clues):
+    """
+    Checks that a grid is a complete Sudoku solution that keeps the clues.
+    """
+    size = len(grid)
+    rows, cols, boxes, _ = sudoku_units(size)
+    cells = [value for row in grid for value in row]
+    if any(sorted(cells[cell] for cell in unit) != list(range(1, size + 1)) for unit in rows + cols + boxes):
+        return False
+    return all(value == 0 or value == cells[r * size + c] for r, row in enumerate(clues) for c, value in enumerate(row))
+
+
+@pytest.mark.parametrize("solver_class, options", CONFIGS, ids=CONFIG_IDS)
+def test_random_formulas_match_brute_force(solver_class, options):
+    for seed in range(60):
+        clauses = random_cnf(seed)
+        result, assignments, _, _ = run(solver_class, dict(enumerate(clauses)), **options)
+        assert result == brute_force(clauses), f"seed {seed}"
+        if result:
+            assert satisfies(assignments, clauses), f"seed {seed}"
+
+
+def test_luby_sequence():
+    assert [luby(i) for i in range(15)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+
+
+def test_cdcl_restarting_after_every_conflict():
+    restarts = 0
+    for seed in range(30):
+        rng = random.Random(seed)
+        clauses = [[rng.choice((1, -1)) * var for var in rng.sample(range(1, 13), 3)] for _ in range(51)]
+        solver = CDCL(dict(enumerate(clauses)))
+        solver.restart_policy = LubyRestarts(unit=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, assignments, _, _ = solver.solve()
+        assert result == brute_force(clauses), f"seed {seed}"
+        if result:
+            assert satisfies(assignments, clauses), f"seed {seed}"
+        restarts += solver.num_restarts
+    assert restarts > 0
+
+
+def test_cdcl_reducing_learned_clauses_after_every_conflict():
+    for seed in range(30):
+        rng = random.Random(seed)
+        clauses = [[rng.choice((1, -1)) * var for var in rng.sample(range(1, 13), 3)] for _ in range(51)]
+        solver = CDCL(dict(enumerate(clauses)), reduce_interval=1, max_learned=2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, assignments, _, _ = solver.solve()
+        assert result == brute_force(clauses), f"seed {seed}"
+        if result:
+            assert satisfies(assignments, clauses), f"seed {seed}"
+        assert len(solver.clauses) == solver.propagator.num_original + solver.propagator.num_learned()
+
+
+@pytest.mark.parametrize("solver_class, options", CONFIGS, ids=CONFIG_IDS)
+def test_unsatisfiable_formula(solver_class, options):
+    # Every assignment of three variables is excluded by one clause
+    clauses = [[a * 1, b * 2, c * 3] for a, b, c in itertools.product((1, -1), repeat=3)]
+    result, _, _, _ = run(solver_class, dict(enumerate(clauses)), **options)
+    assert result is False
+
+
+@pytest.mark.parametrize("solver_class", [DPLL, JW, CDCL])
+def test_search_deeper_than_the_recursion_limit(solver_class):
+    # Nothing propagates, so every one of the 5000 variables takes a decision
+    clauses = {index: [2 * index + 1, 2 * index + 2] for index in range(2500)}
+    result, assignments, _, _ = run(solver_class, clauses)
+    assert result
+    assert satisfies(assignments, clauses.values())
+
+
+@pytest.mark.parametrize("solver_class, options", CONFIGS, ids=CONFIG_IDS)
+def test_9x9_smoke(solver_class, options):
+    clauses, _ = parse_cnf("output_cnfs/9x9_1.cnf")
+    result, assignments, _, _ = run(solver_class, clauses, **options)
+    assert result
+    assert satisfies(assignments, clauses.values())
+    assert valid_solution(model_to_grid(assignments, 9, legacy_var), [[0] * 9 for _ in range(9)])
+
+
+@pytest.mark.parametrize("solver_class", [DPLL, CDCL])
+def test_16x16_smoke(solver_class):
+    grid = read_puzzles("16x16.txt")[0]
+    result, assignments, _, _ = run(solver_class, load_puzzle("sudoku-rules-16x16.txt", clue_literals(grid)))
+    assert result
+    assert valid_solution(model_to_grid(assignments, 16, legacy_var), grid)
+
+
+@pytest.mark.parametrize("puzzle_file", ["4x4.txt", "top100.txt", "16x16.txt"])
+def test_bitmask_solutions_satisfy_the_encoding(puzzle_file):
+    for grid in read_puzzles(puzzle_file)[:5]:
+        result, assignments, _, _ = run(BitmaskSudoku, grid)
+        store, _ = encode_sudoku(grid)
+        assert result
+        assert satisfies(assignments, store.to_clauses().values())
+        assert valid_solution(model_to_grid(assignments, len(grid)), grid)
+
+
+def test_bitmask_contradictory_clues():
+    grid = [[0] * 9 for _ in range(9)]
+    grid[0][0] = grid[0][8] = 5
+    result, assignments, _, _ = run(BitmaskSudoku, grid)
+    assert not result
+    assert assignments == {}
+
+
+def test_vectorized_propagation_solves_easy_grids():
+    grids = read_puzzles("4x4.txt")
+    candidates = candidate_array(grids)
+    status, _ = propagate(candidates, GridIndex(4))
+    assert (status == SOLVED).all()
+
+
+@pytest.mark.parametrize("solver_class", [CDCL, DPLL, BitmaskSudoku])
+def test_solve_batch_mixes_vectorized_and_search(solver_class):
+    grids = read_puzzles("9x9.txt")[:20]
+    contradictory = [[0] * 9 for _ in range(9)]
+    contradictory[0][0] = contradictory[8][0] = 3
+    results = solve_batch(grids + [contradictory], solver_class)
+    assert {result["stage"] for result in results[:-1]} == {"vectorized", "search"}
+    for grid, result in zip(grids, results):
+        assert result["status"] == "SATISFIABLE"
+        assert valid_solution(parse_grid(result["solution"]), grid)
+        assert model_to_grid(result["assignments"], 9) == parse_grid(result["solution"])
+    assert results[-1]["status"] == "UNSATISFIABLE"
+    assert propagate(candidate_array([contradictory]), GridIndex(9))[0][0] == CONTRADICTION
+
+
+def test_solve_batch_reports_unknown_within_the_time_limit():
+    result, = solve_batch(read_puzzles("16x16.txt")[:1], JW, time_limit=0.3)
+    assert result["stage"] == "search" and result["status"] == "UNKNOWN"
+    assert result["assignments"] == {} and "solution" not in result
+    assert result["evaluations"] > 0 and result["time_taken"] < 5
+
+
+def test_percentiles_and_regression_check():
+    times_ns = [1_000_000 * value for value in range(1, 101)]
+    assert percentile(times_ns, 0.5) == 50_000_000
+    assert percentile(times_ns, 0.99) == 99_000_000
+    summary = summarize(times_ns)
+    assert summary["median_ms"] == 50.5 and summary["p95_ms"] == 95.0
+    baseline = {"results": [dict(summary, solver="CDCL", set="9x9")]}
+    slower = {"results": [dict(summary, solver="CDCL", set="9x9", median_ms=60.0)]}
+    assert not compare(baseline, baseline)[1]
+    assert compare(baseline, slower, threshold=0.1)[1]
+    assert not compare(baseline, slower, threshold=0.2)[1]
+
+
+@pytest.mark.parametrize("solver_class, options", [(DPLL, {"pure_literals": True}), (JW, {}), (CDCL, {})])
+def test_profile_records_phases(solver_class, options, tmp_path):
+    clauses, _ = parse_cnf("output_cnfs/9x9-hard_13.cnf")
+    plain = solver_class(clauses, **options)
+    assert "propagate" not in vars(plain.propagator)  # Nothing wrapped without a profile
+    profile = SolverProfile(cprofile=True)
+    with profile.phase("parse"):
+        clauses, _ = parse_cnf("output_cnfs/9x9-hard_13.cnf")
+    solver = solver_class(clauses, profile=profile, **options)
+    result, _, evals, _ = profile.run().as_tuple()
+    data = profile.to_dict()
+    assert result and data["evaluations"] == evals
+    assert data["phases"]["parse"]["calls"] == 1
+    assert data["phases"]["propagate"]["calls"] >= evals
+    assert data["phases"]["decide"]["calls"] > 0
+    assert (data["phases"]["analyze"]["calls"] > 0) == (solver_class is CDCL and solver.num_backtracking > 0)
+    assert (data["phases"]["pure_literals"]["calls"] > 0) == bool(options)
+    assert data["clause_visits"] >= data["propagations"] > 0
+    profile.save_json(tmp_path / "profile.json")
+    profile.save_pstats(tmp_path / "profile.prof")
+
+
+@pytest.mark.parametrize("solver", ["CDCL", "DPLL", "JW"])
+def test_quiet_api_reports_through_callbacks_only(solver, capsys, caplog):
+    updates = []
+    logger = logging.getLogger("solver-test")
+    with caplog.at_level(logging.INFO, logger="solver-test"):
+        result = solve_formula("output_cnfs/9x9-hard_13.cnf", solver, logger=logger,
+                               progress=updates.append, progress_every=10)
+    assert capsys.readouterr().out == ""
+    assert result.satisfiable and result.status == "SATISFIABLE"
+    clauses, _ = parse_cnf("output_cnfs/9x9-hard_13.cnf")
+    assert satisfies(result.model, clauses.values())
+    assert result.stats["evaluations"] > 0 and result.stats["propagations"] > 0
+    assert set(result.timings) == {"build", "solve"}
+    assert len(updates) >= result.stats["evaluations"] // 10 > 0
+    assert [record.levelname for record in caplog.records] == ["INFO", "INFO"]
+
+
+@pytest.mark.parametrize("solver", ["CDCL", "BITMASK"])
+def test_quiet_api_takes_grids(solver, capsys):
+    grid = read_puzzles("top100.txt")[0]
+    result = solve_formula(grid, solver)
+    assert capsys.readouterr().out == ""
+    assert valid_solution(model_to_grid(result.model, 9), grid)
+    contradictory = [[0] * 9 for _ in range(9)]
+    contradictory[0][0] = contradictory[0][1] = 1
+    unsat = solve_formula(contradictory, solver)
+    assert unsat.status == "UNSATISFIABLE" and unsat.model == {}
+
+
+@pytest.mark.parametrize("solver, limits, stopped_by", [
+    ("DPLL", {"max_decisions": 5}, "decisions"),
+    ("JW", {"time_limit": 0.2}, "time"),
+    ("CDCL", {"max_conflicts": 3}, "conflicts"),
+    ("BITMASK", {"max_decisions": 1}, "decisions"),
+])
+def test_budgets_stop_the_search_with_partial_stats(solver, limits, stopped_by):
+    grid = read_puzzles("16x16.txt")[0] if solver == "JW" else read_puzzles("top100.txt")[0]
+    result = solve_formula(grid, solver, **limits)
+    assert result.status == "UNKNOWN" and result.model == {}
+    assert result.stats["stopped_by"] == stopped_by
+    assert result.stats["evaluations"] > 0
+    if "max_decisions" in limits:
+        assert result.stats["decisions"] == limits["max_decisions"]
+    if "max_conflicts" in limits:
+        assert result.stats["conflicts"] == limits["max_conflicts"]
+    assert solve_formula(grid, solver if solver != "JW" else "CDCL").satisfiable
+
+
+def test_batch_reports_unknown_within_the_time_limit():
+    grid = read_puzzles("16x16.txt")[0]
+    (_, result), = solve_many([grid], JW, workers=1, timeout=0.5)
+    assert result["status"] == "UNKNOWN"
+    assert result["evaluations"] > 0
+    assert result["time_taken"] < 5
+
+
+def test_portfolio_race_takes_the_first_answer():
+    result = race("output_cnfs/9x9-hard_13.cnf", ["cdcl-luby", "jw"], time_limit=30)
+    assert result["status"] == "SATISFIABLE" and result["winner"] in ("cdcl-luby", "jw")
+    assert valid_solution(model_to_grid(result["model"], 9, legacy_var), [[0] * 9 for _ in range(9)])
+    assert set(result["configs"].values()) <= {"SATISFIABLE", "CANCELLED"}
+
+    contradictory = [[1, 1, 0, 0]] + [[0] * 4 for _ in range(3)]
+    result = race(contradictory, ["dpll", "cdcl-glucose"])
+    assert result["status"] == "UNSATISFIABLE" and result["model"] == {}
+    assert win_counts([(grid_size(contradictory), result)]) == {"4x4": {result["winner"]: 1}}
+
+
+@pytest.mark.parametrize("splitter", ["jw", "lookahead"])
+def test_cube_and_conquer(splitter):
+    grid = read_puzzles("16x16.txt")[0]
+    result = cube_and_conquer(grid, "CDCL", workers=2, depth=3, splitter=splitter)
+    assert result["status"] == "SATISFIABLE"
+    assert 0 < result["stats"]["cubes"] <= 8
+    assert valid_solution(model_to_grid(result["model"], 16), grid)
+
+    contradictory = [[1, 1, 0, 0]] + [[0] * 4 for _ in range(3)]
+    assert cube_and_conquer(contradictory, "DPLL", workers=2, splitter=splitter)["status"] == "UNSATISFIABLE"
+
+
+@pytest.mark.parametrize("splitter", ["jw", "lookahead"])
+def test_cubes_cover_every_model(splitter):
+    for seed in range(60):
+        clauses = random_cnf(seed)
+        cubes = Splitter(ClauseStore.from_clauses(clauses), splitter).split(3)
+        variables = sorted({abs(literal) for clause in clauses for literal in clause})
+        for values in itertools.product((True, False), repeat=len(variables)):
+            assignments = dict(zip(variables, values))
+            if satisfies(assignments, clauses):
+                assert any(all(assignments[abs(literal)] == (literal > 0) for literal in cube) for cube in cubes), \
+                    f"seed {seed}"
+
+
+@pytest.mark.parametrize("solver", ["CDCL", "DPLL", "JW"])
+def test_solvers_leave_the_callers_store_alone(solver):
+    store, _ = parse_cnf("output_cnfs/9x9-hard_13.cnf", compact=True)
+    num_clauses = len(store)
+    literals = store.literals.tolist()
+    assert solve_formula(store, solver).satisfiable
+    assert len(store) == num_clauses and store.literals.tolist() == literals
+
+
+def test_rules_are_hashed_again_only_when_the_file_changes(tmp_path, monkeypatch):
+    rules_file = tmp_path / "rules.txt"
+    rules_file.write_text("p cnf 2 1\n1 2 0\n")
+    hashed = []
+    file_hash = rules_cache.file_hash
+    monkeypatch.setattr(rules_cache, "file_hash", lambda path: hashed.append(path) or file_hash(path))
+    for _ in range(3):
+        store, _ = load_base_rules(str(rules_file), cache_dir=str(tmp_path / "cache"))
+    assert len(hashed) == 1 and len(store) == 1
+
+    rules_file.write_text("p cnf 2 2\n1 2 0\n-1 -2 0\n")
+    store, _ = load_base_rules(str(rules_file), cache_dir=str(tmp_path / "cache"))
+    assert len(hashed) == 2 and len(store) == 2
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+@pytest.mark.parametrize("at_most_one", AT_MOST_ONE)
+def test_encodings_solve_and_refute(encoding, at_most_one):
+    for grid in read_puzzles("4x4.txt")[:3] + read_puzzles("top100.txt")[:2]:
+        store, _ = encode_sudoku(grid, encoding, at_most_one)
+        result = solve_formula(store, "CDCL")
+        assert result.satisfiable
+        assert valid_solution(model_to_grid(result.model, len(grid)), grid)
+
+    contradictory = [[1, 1, 0, 0]] + [[0] * 4 for _ in range(3)]
+    store, _ = encode_sudoku(contradictory, encoding, at_most_one)
+    assert solve_formula(store, "CDCL").status == "UNSATISFIABLE"
+
+
+@pytest.mark.parametrize("solver", ["CDCL", "DPLL", "JW"])
+def test_residual_formula_rebuilds_the_solution(solver):
+    for grid in read_puzzles("4x4.txt")[:2] + [read_puzzles("top100.txt")[index] for index in (0, 3, 5)]:
+        clauses, _, variables, solved_cells = residual_formula(grid)
+        result = solve_formula(clauses, solver)
+        assert result.satisfiable
+        assert valid_solution(solution_grid(solved_cells, variables, result.model), grid)
+
+    contradictory = [[1, 1, 0, 0]] + [[0] * 4 for _ in range(3)]
+    assert reduce_candidates(contradictory) is None
+    assert residual_formula(contradictory) == ({0: []}, 0, [], None)
+
+
+def test_dimacs_parser_keeps_literals_ending_in_zero(tmp_path):
+    cnf_file = tmp_path / "formula.cnf"
+    cnf_file.write_text("c literals ending in 0\np cnf 120 4\n110 -120 0\n-110 0\nc between clauses\n"
+                        "1 2 10 0\n%\n0\n-2 -10 120\n")
+    expected = [[110, -120], [-110], [1, 2, 10], [-2, -10, 120]]
+    assert parse_dimacs(str(cnf_file)) == (120, expected)
+    store, num_vars = load_dimacs(str(cnf_file))
+    assert num_vars == 120
+    assert list(store.to_clauses().values()) == expected